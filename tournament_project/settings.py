@@ -23,6 +23,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tournaments.metrics.MetricsMiddleware',
+    'tournaments.routers.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -56,13 +58,20 @@ WSGI_APPLICATION = 'tournament_project.wsgi.application'
 # Database configuration - supports both PostgreSQL (Docker) and SQLite (local)
 USE_SQLITE = os.environ.get('USE_SQLITE', 'False') == 'True'
 
+# Persistent connections, checked before reuse so a dropped connection is replaced instead of failing a request.
+CONN_MAX_AGE = int(os.environ.get('CONN_MAX_AGE', '60'))
+
 if USE_SQLITE:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
+    # Stand-in replica for local development and tests; enable it with DATABASE_REPLICAS=replica.
+    DATABASES['replica'] = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
 else:
     DATABASES = {
         'default': {
@@ -72,8 +81,69 @@ else:
             'PASSWORD': os.environ.get('POSTGRES_PASSWORD', 'tournament_pass'),
             'HOST': os.environ.get('POSTGRES_HOST', 'db'),
             'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
         }
     }
+    # POSTGRES_REPLICA_HOSTS=replica1:5432,replica2 adds one read-only alias per host.
+    for index, host in enumerate(filter(None, os.environ.get('POSTGRES_REPLICA_HOSTS', '').split(',')), start=1):
+        host, _, port = host.strip().partition(':')
+        DATABASES[f'replica{index}'] = dict(
+            DATABASES['default'], HOST=host, PORT=port or DATABASES['default']['PORT'], TEST={'MIRROR': 'default'}
+        )
+
+# Safe-method requests read from these aliases; writes, and the reads of a client that wrote within the
+# sticky window, go to the primary.
+DATABASE_REPLICAS = [alias for alias in os.environ.get('DATABASE_REPLICAS', '').split(',') if alias]
+if not USE_SQLITE and not DATABASE_REPLICAS:
+    DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_REPLICA_STICKY_SECONDS = int(os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', '5'))
+DATABASE_REPLICA_STICKY_COOKIE = 'use_primary'
+DATABASE_ROUTERS = ['tournaments.routers.ReplicaRouter']
+
+# Cache configuration - locmem by default, any Django cache backend can be plugged in via env vars.
+# Leaderboards of finished tournaments never change, so they are kept without expiry in their own alias,
+# while active tournaments live in a bounded cache that evicts the least recently used entries.
+TOURNAMENT_CACHE_BACKEND = os.environ.get('TOURNAMENT_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+TOURNAMENT_CACHE_LOCATION = os.environ.get('TOURNAMENT_CACHE_LOCATION', '')
+
+
+def tournament_cache(name, timeout, max_entries):
+    config = {
+        'BACKEND': TOURNAMENT_CACHE_BACKEND,
+        'LOCATION': TOURNAMENT_CACHE_LOCATION or name,
+        'TIMEOUT': timeout,
+    }
+    if TOURNAMENT_CACHE_BACKEND.endswith('LocMemCache'):
+        config['OPTIONS'] = {'MAX_ENTRIES': max_entries}
+    return config
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tournaments': tournament_cache(
+        'tournaments',
+        timeout=int(os.environ.get('TOURNAMENT_CACHE_TIMEOUT', '300')),
+        max_entries=int(os.environ.get('TOURNAMENT_CACHE_MAX_ENTRIES', '1000')),
+    ),
+    'tournaments-finished': tournament_cache(
+        'tournaments-finished',
+        timeout=None,
+        max_entries=int(os.environ.get('TOURNAMENT_FINISHED_CACHE_MAX_ENTRIES', '100000')),
+    ),
+}
+
+TOURNAMENT_CACHE_ALIAS = 'tournaments'
+TOURNAMENT_FINISHED_CACHE_ALIAS = 'tournaments-finished'
+
+# Live leaderboards (Server-Sent Events). The broker fans each update out to every subscriber of a tournament;
+# the in-process default only reaches clients connected to the same worker process.
+TOURNAMENT_LIVE_BROKER = os.environ.get('TOURNAMENT_LIVE_BROKER', 'tournaments.live.InMemoryBroker')
+TOURNAMENT_LIVE_HEARTBEAT = float(os.environ.get('TOURNAMENT_LIVE_HEARTBEAT', '15'))
+TOURNAMENT_LIVE_MAX_AGE = float(os.environ.get('TOURNAMENT_LIVE_MAX_AGE', '300'))
+TOURNAMENT_LIVE_RETRY_MS = int(os.environ.get('TOURNAMENT_LIVE_RETRY_MS', '1000'))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -104,11 +174,24 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'tournaments.renderers.FastJSONRenderer',
         'rest_framework.renderers.BrowsableAPIRenderer',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'tournaments.pagination.HybridPagination',
     'PAGE_SIZE': 100
 }
 
+# The player, tournament and game lists and the leaderboard build their responses straight from values() rows
+# instead of running the model serializers; the output is the same.
+TOURNAMENT_LEAN_READS = os.environ.get('TOURNAMENT_LEAN_READS', 'True') == 'True'
+
 CORS_ALLOW_ALL_ORIGINS = True
+
+# Elo ratings - changing the K-factor only affects new results until `manage.py recompute_ratings` is run.
+ELO_INITIAL_RATING = float(os.environ.get('ELO_INITIAL_RATING', '1500'))
+ELO_K_FACTOR = float(os.environ.get('ELO_K_FACTOR', '32'))
+
+# Request metrics exposed at /metrics. Only a sample of requests has its queries timed (the wall time of
+# every request is measured); requests slower than the threshold are logged with their slowest query.
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '0.1'))
+METRICS_SLOW_REQUEST_MS = float(os.environ.get('METRICS_SLOW_REQUEST_MS', '500'))
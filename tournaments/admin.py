@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Player, Tournament, Game
+from .models import Player, PlayerStats, Tournament, Game, Standing
 
 
 @admin.register(Player)
@@ -21,3 +21,16 @@ class GameAdmin(admin.ModelAdmin):
     list_display = ['id', 'tournament', 'player1', 'player2', 'winner', 'is_draw', 'played_at']
     list_filter = ['tournament', 'is_draw', 'played_at']
     search_fields = ['tournament__name', 'player1__name', 'player2__name']
+
+
+@admin.register(Standing)
+class StandingAdmin(admin.ModelAdmin):
+    list_display = ['id', 'tournament', 'player', 'points', 'wins', 'draws', 'losses', 'games_played']
+    list_filter = ['tournament']
+    search_fields = ['tournament__name', 'player__name']
+
+
+@admin.register(PlayerStats)
+class PlayerStatsAdmin(admin.ModelAdmin):
+    list_display = ['player', 'tournaments_entered', 'points', 'wins', 'draws', 'losses', 'games_played', 'win_rate']
+    search_fields = ['player__name']
@@ -0,0 +1,129 @@
+import asyncio
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from .leaderboard import aget_leaderboard
+from .live import RESYNC, format_event, get_broker
+from .models import Tournament, Game
+from .serializers import GameSerializer, RosterTournamentSerializer
+
+
+def not_found(message='Not found.'):
+    return JsonResponse({'detail': message}, status=404)
+
+
+class AsyncTournamentDetailView(View):
+    async def get(self, request, pk):
+        # Django 4.2 runs every async ORM call on one shared thread, so the queries are awaited one after the
+        # other; gathering them would not overlap them.
+        tournament = await Tournament.objects.filter(pk=pk).afirst()
+        if tournament is None:
+            return not_found()
+        players = await self.get_player_ids(pk)
+
+        return JsonResponse(RosterTournamentSerializer(tournament, context={'players': players}).data)
+
+    async def get_player_ids(self, pk):
+        roster = Tournament.players.through.objects.filter(tournament_id=pk).order_by('player__name')
+        return [player_id async for player_id in roster.values_list('player_id', flat=True)]
+
+
+class AsyncTournamentLeaderboardView(View):
+    async def get(self, request, pk):
+        tournament = await Tournament.objects.filter(pk=pk).afirst()
+        if tournament is None:
+            return not_found()
+        return JsonResponse(await aget_leaderboard(tournament))
+
+
+class TournamentLiveLeaderboardView(View):
+    async def get(self, request, pk):
+        tournament = await Tournament.objects.filter(pk=pk).afirst()
+        if tournament is None:
+            return not_found()
+
+        response = StreamingHttpResponse(self.stream(tournament), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def snapshot(self, tournament):
+        leaderboard = await aget_leaderboard(tournament)
+        return tournament.version, format_event('snapshot', leaderboard, tournament.version)
+
+    async def stream(self, tournament):
+        broker = get_broker()
+        # Subscribe before taking the snapshot so no change can fall between the two.
+        subscription = broker.subscribe(tournament.pk)
+        try:
+            version, event = await self.snapshot(tournament)
+            yield f'retry: {settings.TOURNAMENT_LIVE_RETRY_MS}\n' + event
+
+            loop = asyncio.get_running_loop()
+            # Django 4.2 does not notice disconnected clients, so streams are bounded and EventSource reconnects.
+            deadline = loop.time() + settings.TOURNAMENT_LIVE_MAX_AGE
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.get(), min(settings.TOURNAMENT_LIVE_HEARTBEAT, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+
+                if message is RESYNC:
+                    tournament = await Tournament.objects.filter(pk=tournament.pk).afirst()
+                    if tournament is None:
+                        return
+                    version, event = await self.snapshot(tournament)
+                    yield event
+                elif message[0] > version:
+                    yield message[1]
+        finally:
+            broker.unsubscribe(subscription)
+
+
+class AsyncGameListView(View):
+    page_size = api_settings.PAGE_SIZE
+    page_query_param = 'page'
+
+    async def get(self, request):
+        queryset = Game.objects.select_related('player1', 'player2', 'winner')
+        tournament_id = request.GET.get('tournament')
+        if tournament_id is not None:
+            if not tournament_id.isdigit():
+                return JsonResponse({'tournament': ['A valid integer is required.']}, status=400)
+            queryset = queryset.filter(tournament_id=tournament_id)
+
+        page_number = request.GET.get(self.page_query_param, '1')
+        if not page_number.isdigit() or int(page_number) < 1:
+            return not_found('Invalid page.')
+        page_number = int(page_number)
+        offset = (page_number - 1) * self.page_size
+
+        count = await queryset.acount()
+        games = await self.get_page(queryset, offset)
+        if not games and page_number > 1:
+            return not_found('Invalid page.')
+
+        url = request.build_absolute_uri()
+        next_url = None
+        if offset + len(games) < count:
+            next_url = replace_query_param(url, self.page_query_param, page_number + 1)
+        previous_url = None
+        if page_number == 2:
+            previous_url = remove_query_param(url, self.page_query_param)
+        elif page_number > 2:
+            previous_url = replace_query_param(url, self.page_query_param, page_number - 1)
+
+        return JsonResponse({
+            'count': count,
+            'next': next_url,
+            'previous': previous_url,
+            'results': GameSerializer(games, many=True).data,
+        })
+
+    async def get_page(self, queryset, offset):
+        return [game async for game in queryset[offset:offset + self.page_size]]
@@ -0,0 +1,173 @@
+import asyncio
+import itertools
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import AsyncClient, Client
+from .models import Player, Tournament, Game
+from .standings import rebuild_player_stats, rebuild_standings
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def benchmark_host():
+    # The test clients send "Host: testserver" by default, which a deployed ALLOWED_HOSTS rejects with a 400.
+    host = next(iter(settings.ALLOWED_HOSTS), '*').lstrip('.')
+    return 'localhost' if host in ('*', '') else host
+
+
+class BenchmarkAsyncClient(AsyncClient):
+    # AsyncClient always sends "Host: testserver" and appends a configured host header instead of replacing it.
+    def __init__(self, host, **defaults):
+        super().__init__(**defaults)
+        self.host = host.encode('ascii')
+
+    async def request(self, **request):
+        request['headers'] = [(name, self.host if name == b'host' else value) for name, value in request['headers']]
+        return await super().request(**request)
+
+
+def benchmark_client(asynchronous=False):
+    if asynchronous:
+        return BenchmarkAsyncClient(benchmark_host())
+    return Client(headers={'host': benchmark_host()})
+
+
+def check_status(status, method, path):
+    # Timing error responses would report them as endpoint latency, so stop instead.
+    if not (200 <= status < 300 or status == 304):
+        raise CommandError(f'{method} {path} returned HTTP {status}; nothing was benchmarked for it.')
+    return status
+
+
+def timed(call):
+    started = time.perf_counter()
+    call()
+    return time.perf_counter() - started
+
+
+def cpu_time_per_call(call, iterations):
+    started = time.process_time()
+    for _ in range(iterations):
+        call()
+    return (time.process_time() - started) / iterations
+
+
+def run_threaded(call, requests, concurrency):
+    started = time.perf_counter()
+    if concurrency == 1:
+        latencies = [timed(call) for _ in range(requests)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(lambda _: timed(call), range(requests)))
+    return latencies, time.perf_counter() - started
+
+
+async def run_concurrently(call, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed_call():
+        async with semaphore:
+            started = time.perf_counter()
+            await call()
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(timed_call() for _ in range(requests)))
+    return list(latencies), time.perf_counter() - started
+
+
+async def http_get(base_url, path):
+    url = urlsplit(base_url)
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {url.netloc}\r\nConnection: close\r\n\r\n'.encode('ascii'))
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return int(status_line.split()[1])
+
+
+def seed_dataset(players, tournaments, players_per_tournament=5, completion=1.0, draw_ratio=0.2,
+                 seed=None, batch_size=1000):
+    rng = random.Random(seed)
+    players_per_tournament = min(players_per_tournament, players)
+
+    with transaction.atomic():
+        offset = Player.objects.count()
+        player_objects = Player.objects.bulk_create(
+            [Player(name=f'Bench Player {offset + index}') for index in range(players)], batch_size=batch_size
+        )
+        player_ids = [player.id for player in player_objects]
+
+        rosters = [rng.sample(player_ids, players_per_tournament) for _ in range(tournaments)]
+        schedules = []
+        for roster in rosters:
+            pairings = list(itertools.combinations(roster, 2))
+            rng.shuffle(pairings)
+            schedules.append(pairings[:round(len(pairings) * completion)])
+
+        tournament_objects = Tournament.objects.bulk_create(
+            [
+                Tournament(
+                    name=f'Bench Tournament {index}',
+                    max_players=max(len(roster), Tournament.DEFAULT_MAX_PLAYERS),
+                    players_count=len(roster),
+                    played_games_count=len(schedule),
+                )
+                for index, (roster, schedule) in enumerate(zip(rosters, schedules))
+            ],
+            batch_size=batch_size,
+        )
+
+        Tournament.players.through.objects.bulk_create(
+            [
+                Tournament.players.through(tournament_id=tournament.id, player_id=player_id)
+                for tournament, roster in zip(tournament_objects, rosters)
+                for player_id in roster
+            ],
+            batch_size=batch_size,
+        )
+
+        games = []
+        for tournament, schedule in zip(tournament_objects, schedules):
+            for player1_id, player2_id in schedule:
+                is_draw = rng.random() < draw_ratio
+                games.append(Game(
+                    tournament_id=tournament.id,
+                    player1_id=player1_id,
+                    player2_id=player2_id,
+                    winner_id=None if is_draw else rng.choice((player1_id, player2_id)),
+                    is_draw=is_draw,
+                ))
+        Game.objects.bulk_create(games, batch_size=batch_size)
+
+        tournament_ids = [tournament.id for tournament in tournament_objects]
+        for start in range(0, len(tournament_ids), batch_size):
+            chunk = tournament_ids[start:start + batch_size]
+            Tournament.objects.filter(pk__in=chunk).refresh_status()
+            rebuild_standings(chunk, batch_size=batch_size)
+        rebuild_player_stats(batch_size=batch_size)
+
+    return len(player_objects), len(tournament_objects), len(games)
@@ -0,0 +1,89 @@
+import threading
+from django.conf import settings
+from django.core.cache import caches
+
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def record(self, name, hit):
+        with self._lock:
+            counters = self._counters.setdefault(name, {'hits': 0, 'misses': 0})
+            counters['hits' if hit else 'misses'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: dict(counters, hit_ratio=counters['hits'] / (counters['hits'] + counters['misses']))
+                for name, counters in self._counters.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+
+
+stats = CacheStats()
+
+
+def get_tournament_cache(tournament):
+    if tournament.status == 'finished':
+        return caches[settings.TOURNAMENT_FINISHED_CACHE_ALIAS]
+    return caches[settings.TOURNAMENT_CACHE_ALIAS]
+
+
+def tournament_cache_key(name, tournament):
+    return f'{name}:{tournament.pk}:{tournament.version}'
+
+
+def get_or_build(name, tournament, build):
+    cache = get_tournament_cache(tournament)
+    key = tournament_cache_key(name, tournament)
+
+    data = cache.get(key)
+    stats.record(name, data is not None)
+    if data is None:
+        data = build(tournament)
+        cache.set(key, data)
+    return data
+
+
+async def aget_or_build(name, tournament, abuild):
+    cache = get_tournament_cache(tournament)
+    key = tournament_cache_key(name, tournament)
+
+    data = await cache.aget(key)
+    stats.record(name, data is not None)
+    if data is None:
+        data = await abuild(tournament)
+        await cache.aset(key, data)
+    return data
+
+
+def get_many_or_build(name, tournaments, build_many):
+    data, missing = {}, []
+    caches_by_alias = {}
+    for tournament in tournaments:
+        caches_by_alias.setdefault(get_tournament_cache(tournament), []).append(tournament)
+
+    for cache, group in caches_by_alias.items():
+        cached = cache.get_many([tournament_cache_key(name, tournament) for tournament in group])
+        for tournament in group:
+            key = tournament_cache_key(name, tournament)
+            stats.record(name, key in cached)
+            if key in cached:
+                data[tournament.pk] = cached[key]
+            else:
+                missing.append(tournament)
+
+    if missing:
+        built = build_many(missing)
+        for cache, group in caches_by_alias.items():
+            cache.set_many({
+                tournament_cache_key(name, tournament): built[tournament.pk]
+                for tournament in group if tournament.pk in built
+            })
+        data.update(built)
+    return [data[tournament.pk] for tournament in tournaments]
@@ -0,0 +1,62 @@
+import functools
+from hashlib import md5
+from django.db.models import prefetch_related_objects
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def tournament_tag(tournament):
+    # Every change to a tournament, its roster, games or standings bumps its version in the same transaction.
+    return f'tournament-{tournament.pk}-{tournament.version}'
+
+
+def player_tag(player):
+    return f'player-{player.pk}-{player.updated_at.timestamp():.6f}'
+
+
+# Answers GET and HEAD with 304 Not Modified after a single primary key lookup, before the view does any work,
+# and adds ETag and Last-Modified headers to full responses. The view reuses the row as self.conditional_object.
+def conditional(model, get_tag):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            self.conditional_object = instance = get_object_or_404(model, pk=kwargs['pk'])
+            etag = quote_etag(f'{get_tag(instance)}-{request.accepted_renderer.format}')
+            last_modified = int(instance.updated_at.timestamp())
+
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+            if request.method in SAFE_METHODS and response.status_code in (200, 304):
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+class ConditionalObjectMixin:
+    conditional_prefetch = ()
+
+    def get_object(self):
+        instance = getattr(self, 'conditional_object', None)
+        if instance is None:
+            return super().get_object()
+        prefetch_related_objects([instance], *self.conditional_prefetch)
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+
+class WeakETagMixin:
+    # List pages have no single version to compare, so they get a weak ETag from a hash of the rendered body.
+    # That saves the transfer, not the work.
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if request.method in SAFE_METHODS and response.status_code == 200:
+            response.render()
+            response['ETag'] = f'W/"{md5(response.content, usedforsecurity=False).hexdigest()}"'
+            response = get_conditional_response(request, etag=response['ETag'], response=response)
+        return response
@@ -0,0 +1,89 @@
+import csv
+import json
+from .models import Game, Standing
+
+
+GAME_EXPORT_FIELDS = [
+    'id', 'tournament', 'player1', 'player2', 'player1_name', 'player2_name',
+    'winner', 'winner_name', 'is_draw', 'round', 'played_at',
+]
+
+STANDING_EXPORT_FIELDS = [
+    'tournament_id', 'tournament_name', 'status', 'player_id', 'player_name',
+    'points', 'wins', 'draws', 'losses', 'games_played',
+]
+
+
+def export_games(tournament_id=None, played_after=None, played_before=None):
+    queryset = Game.objects.all()
+    if tournament_id is not None:
+        queryset = queryset.filter(tournament_id=tournament_id)
+    if played_after is not None:
+        queryset = queryset.filter(played_at__gte=played_after)
+    if played_before is not None:
+        queryset = queryset.filter(played_at__lt=played_before)
+
+    return queryset.order_by('-played_at', '-id').values_list(
+        'id',
+        'tournament_id',
+        'player1_id',
+        'player2_id',
+        'player1__name',
+        'player2__name',
+        'winner_id',
+        'winner__name',
+        'is_draw',
+        'round',
+        'played_at',
+    )
+
+
+def export_standings(tournament_id=None):
+    queryset = Standing.objects.all()
+    if tournament_id is not None:
+        queryset = queryset.filter(tournament_id=tournament_id)
+
+    return queryset.order_by('-tournament__created_at', 'tournament_id', '-points', 'player__name').values_list(
+        'tournament_id',
+        'tournament__name',
+        'tournament__status',
+        'player_id',
+        'player__name',
+        'points',
+        'wins',
+        'draws',
+        'losses',
+        'games_played',
+    )
+
+
+def format_value(value):
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+    return value
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def stream_ndjson(fields, rows, chunk_size):
+    encoder = json.JSONEncoder(separators=(',', ':'))
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield encoder.encode(dict(zip(fields, map(format_value, row)))) + '\n'
+
+
+def stream_csv(fields, rows, chunk_size):
+    writer = csv.writer(Echo())
+    yield writer.writerow(fields)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield writer.writerow([format_value(value) for value in row])
+
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', stream_ndjson),
+    'csv': ('text/csv', stream_csv),
+}
@@ -0,0 +1,243 @@
+import csv
+import json
+from collections import Counter, defaultdict
+from django.db import IntegrityError, connections, router, transaction
+from django.utils import timezone
+from rest_framework import serializers
+from .models import DUPLICATE_PAIRING_MESSAGE, Player, PlayerStats, Tournament, Game, Standing
+
+
+class GameResultSerializer(serializers.Serializer):
+    tournament = serializers.IntegerField()
+    player1 = serializers.IntegerField()
+    player2 = serializers.IntegerField()
+    winner = serializers.IntegerField(required=False, allow_null=True)
+    is_draw = serializers.BooleanField(default=False)
+
+
+class GameBatchSerializer(serializers.Serializer):
+    games = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=1000)
+    atomic = serializers.BooleanField(default=False)
+
+
+def _does_not_exist(pk):
+    return [f'Invalid pk "{pk}" - object does not exist.']
+
+
+class GameBatch:
+    def __init__(self, items):
+        self.items = items
+        self.errors = {}
+        self.results = {}
+
+        for index, item in enumerate(items):
+            serializer = GameResultSerializer(data=item)
+            if serializer.is_valid():
+                self.results[index] = serializer.validated_data
+            else:
+                self.errors[index] = serializer.errors
+
+        tournament_ids = {result['tournament'] for result in self.results.values()}
+        player_ids = {
+            player_id
+            for result in self.results.values()
+            for player_id in (result['player1'], result['player2'], result.get('winner'))
+            if player_id is not None
+        }
+
+        self.tournaments = Tournament.objects.in_bulk(tournament_ids)
+        self.player_names = dict(Player.objects.filter(id__in=player_ids).order_by().values_list('id', 'name'))
+        # Rosters and pairings are only loaded for the players in this batch, so large tournaments cost the same.
+        self.rosters = defaultdict(set)
+        for tournament_id, player_id in Tournament.players.through.objects.filter(
+            tournament_id__in=tournament_ids, player_id__in=player_ids
+        ).values_list('tournament_id', 'player_id'):
+            self.rosters[tournament_id].add(player_id)
+        # Maps every recorded pairing to its game id while the game is still a pending fixture, else to None.
+        self.pairings = {
+            (tournament_id, min(player1_id, player2_id), max(player1_id, player2_id)): (
+                None if winner_id or is_draw else game_id
+            )
+            for game_id, tournament_id, player1_id, player2_id, winner_id, is_draw in Game.objects.filter(
+                tournament_id__in=tournament_ids, player1_id__in=player_ids, player2_id__in=player_ids
+            ).order_by().values_list('id', 'tournament_id', 'player1_id', 'player2_id', 'winner_id', 'is_draw')
+        }
+
+        for index, result in list(self.results.items()):
+            errors = self.validate(result)
+            if errors:
+                self.errors[index] = errors
+                del self.results[index]
+
+    def validate(self, result):
+        tournament_id = result['tournament']
+        player1_id = result['player1']
+        player2_id = result['player2']
+        winner_id = result.get('winner')
+        is_draw = result['is_draw']
+
+        field_errors = {}
+        if tournament_id not in self.tournaments:
+            field_errors['tournament'] = _does_not_exist(tournament_id)
+        for field in ('player1', 'player2', 'winner'):
+            player_id = result.get(field)
+            if player_id is not None and player_id not in self.player_names:
+                field_errors[field] = _does_not_exist(player_id)
+        if field_errors:
+            return field_errors
+
+        roster = self.rosters[tournament_id]
+        if player1_id == player2_id:
+            return {'non_field_errors': ['A player cannot play against themselves.']}
+        if player1_id not in roster:
+            return {'non_field_errors': [f'{self.player_names[player1_id]} is not part of this tournament.']}
+        if player2_id not in roster:
+            return {'non_field_errors': [f'{self.player_names[player2_id]} is not part of this tournament.']}
+        if winner_id and is_draw:
+            return {'non_field_errors': ['A game cannot have both a winner and be a draw.']}
+        if winner_id and winner_id not in (player1_id, player2_id):
+            return {'non_field_errors': ['Winner must be one of the players in the game.']}
+
+        pairing = (tournament_id, min(player1_id, player2_id), max(player1_id, player2_id))
+        if pairing in self.pairings:
+            fixture_id = self.pairings[pairing]
+            if fixture_id is None or not (winner_id or is_draw):
+                return {'non_field_errors': [DUPLICATE_PAIRING_MESSAGE]}
+            result['fixture'] = fixture_id
+        self.pairings[pairing] = None
+
+        return None
+
+    def save(self):
+        games = [
+            Game(
+                id=result.get('fixture'),
+                tournament_id=result['tournament'],
+                player1_id=result['player1'],
+                player2_id=result['player2'],
+                winner_id=result.get('winner'),
+                is_draw=result['is_draw'],
+            )
+            for index, result in sorted(self.results.items())
+        ]
+        new_games = [game for game in games if game.id is None]
+        fixtures = [game for game in games if game.id is not None]
+
+        with transaction.atomic():
+            if fixtures:
+                fixture_ids = [fixture.id for fixture in fixtures]
+                pending = Game.objects.select_for_update().filter(id__in=fixture_ids).pending()
+                if len(pending.values_list('id', flat=True)) != len(fixture_ids):
+                    raise IntegrityError('A scheduled game was scored by a concurrent request.')
+                played_at = timezone.now()
+                for fixture in fixtures:
+                    fixture.played_at = played_at
+                Game.objects.bulk_update(fixtures, ['winner', 'is_draw', 'played_at'])
+            Game.objects.bulk_create(new_games)
+
+            deltas = defaultdict(lambda: defaultdict(Counter))
+            for game in games:
+                for player_id, delta in game.get_standing_deltas().items():
+                    deltas[game.tournament_id][player_id].update(delta)
+            for tournament_id, player_deltas in deltas.items():
+                Standing.objects.apply_deltas(tournament_id, player_deltas)
+
+            played_games = Counter(game.tournament_id for game in games if game.is_played)
+            for tournament_id in {game.tournament_id for game in games}:
+                Tournament.objects.filter(pk=tournament_id).record_games(played_games[tournament_id])
+
+            Player.objects.rate_games(games)
+
+        return games
+
+
+def decode_lines(lines):
+    lines = iter(lines)
+    first = next(lines, b'')
+    yield first.decode('utf-8-sig')
+    for line in lines:
+        yield line.decode('utf-8')
+
+
+class PlayerImport:
+    max_reported_errors = 100
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.created_ids = []
+        self.skipped = 0
+        self.invalid = 0
+        self.errors = []
+
+    def add_error(self, line, message):
+        self.invalid += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append({'line': line, 'error': message})
+
+    def parse_csv(self, lines):
+        reader = csv.DictReader(decode_lines(lines))
+        if not reader.fieldnames or 'name' not in reader.fieldnames:
+            raise ValueError('The CSV header must contain a "name" column.')
+        for row in reader:
+            yield reader.line_num, row['name']
+
+    def parse_ndjson(self, lines):
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                self.add_error(line_number, 'Invalid JSON.')
+                continue
+            yield line_number, item.get('name') if isinstance(item, dict) else None
+
+    def run(self, rows):
+        chunk = {}
+        for line_number, name in rows:
+            name = name.strip() if isinstance(name, str) else ''
+            if not name:
+                self.add_error(line_number, 'This field may not be blank.')
+            elif len(name) > Player._meta.get_field('name').max_length:
+                self.add_error(line_number, 'Ensure this field has no more than 100 characters.')
+            elif name in chunk:
+                self.skipped += 1
+            else:
+                chunk[name] = line_number
+                if len(chunk) >= self.chunk_size:
+                    self.insert(chunk)
+                    chunk = {}
+        if chunk:
+            self.insert(chunk)
+        return self
+
+    def insert(self, chunk):
+        names = list(chunk)
+        with transaction.atomic():
+            while True:
+                existing = set(Player.objects.filter(name__in=names).values_list('name', flat=True))
+                names = [name for name in names if name not in existing]
+                try:
+                    # A name inserted by a concurrent request since the lookup only rolls back this savepoint,
+                    # and the next pass skips it.
+                    with transaction.atomic():
+                        players = Player.objects.bulk_create([Player(name=name) for name in names])
+                    break
+                except IntegrityError:
+                    continue
+            if connections[router.db_for_write(Player)].features.can_return_rows_from_bulk_insert:
+                created = [player.pk for player in players]
+            else:
+                created = list(Player.objects.filter(name__in=names).order_by('id').values_list('id', flat=True))
+            PlayerStats.objects.bulk_create([PlayerStats(player_id=player_id) for player_id in created])
+        self.created_ids.extend(created)
+        self.skipped += len(chunk) - len(created)
+
+    def summary(self):
+        return {
+            'created': len(self.created_ids),
+            'skipped': self.skipped,
+            'invalid': self.invalid,
+            'ids': self.created_ids,
+            'errors': self.errors,
+        }
@@ -0,0 +1,75 @@
+from collections import defaultdict
+from django.conf import settings
+from django.db.models import F
+from .cache import aget_or_build, get_many_or_build, get_or_build
+from .lean import LEADERBOARD_ENTRY_COLUMNS
+from .models import Standing
+from .serializers import TournamentLeaderboardSerializer
+
+
+def get_leaderboard_entries(tournament_id):
+    return Standing.objects.filter(tournament_id=tournament_id).annotate(
+        player_name=F('player__name'),
+    ).order_by('-points', 'player__name', 'player_id').values(
+        'player_id', 'player_name', 'points', 'wins', 'draws', 'losses', 'games_played'
+    )
+
+
+def get_grouped_leaderboard_entries(tournament_ids):
+    entries = defaultdict(list)
+    for entry in Standing.objects.filter(tournament_id__in=tournament_ids).annotate(
+        player_name=F('player__name'),
+    ).order_by('tournament_id', '-points', 'player__name', 'player_id').values(
+        'tournament_id', 'player_id', 'player_name', 'points', 'wins', 'draws', 'losses', 'games_played'
+    ):
+        entries[entry.pop('tournament_id')].append(entry)
+    return entries
+
+
+def build_leaderboard(tournament, leaderboard_data=None):
+    if leaderboard_data is None:
+        leaderboard_data = list(get_leaderboard_entries(tournament.id))
+    total_players = len(leaderboard_data)
+
+    return {
+        'tournament_id': tournament.id,
+        'tournament_name': tournament.name,
+        'status': tournament.status,
+        'total_players': total_players,
+        'total_games_played': tournament.played_games_count,
+        'total_expected_games': (total_players * (total_players - 1)) // 2,
+        'leaderboard': leaderboard_data,
+    }
+
+
+def serialize_leaderboard(tournament, leaderboard_data):
+    if settings.TOURNAMENT_LEAN_READS:
+        return build_leaderboard(tournament, LEADERBOARD_ENTRY_COLUMNS.build(leaderboard_data))
+    return TournamentLeaderboardSerializer(build_leaderboard(tournament, list(leaderboard_data))).data
+
+
+def get_leaderboard(tournament):
+    return get_or_build(
+        'leaderboard',
+        tournament,
+        lambda tournament: serialize_leaderboard(tournament, get_leaderboard_entries(tournament.id))
+    )
+
+
+def build_leaderboards(tournaments):
+    entries = get_grouped_leaderboard_entries([tournament.id for tournament in tournaments])
+    return {tournament.id: serialize_leaderboard(tournament, entries[tournament.id]) for tournament in tournaments}
+
+
+def get_leaderboards(tournaments):
+    # Cached leaderboards are reused; the rest are built together from a single standings query.
+    return get_many_or_build('leaderboard', tournaments, build_leaderboards)
+
+
+async def abuild_leaderboard(tournament):
+    leaderboard_data = [entry async for entry in get_leaderboard_entries(tournament.id)]
+    return serialize_leaderboard(tournament, leaderboard_data)
+
+
+async def aget_leaderboard(tournament):
+    return await aget_or_build('leaderboard', tournament, abuild_leaderboard)
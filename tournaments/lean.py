@@ -0,0 +1,78 @@
+from collections import defaultdict
+from .export import format_value
+from .models import Tournament
+
+
+# Maps the keys of a serializer's output to the values() lookups they are read from, so read endpoints can build
+# the same response dicts without instantiating models or running serializer fields.
+class LeanColumns:
+    def __init__(self, **columns):
+        self.keys = list(columns)
+        self.lookups = list(dict.fromkeys(columns.values()))
+        self.columns = list(columns.items())
+
+    def values(self, queryset):
+        return queryset.prefetch_related(None).values(*self.lookups)
+
+    def build(self, rows):
+        columns = self.columns
+        return [{key: format_value(row[lookup]) for key, lookup in columns} for row in rows]
+
+
+class TournamentColumns(LeanColumns):
+    def build(self, rows):
+        items = super().build(rows)
+        rosters = get_rosters([item['id'] for item in items])
+        # The 'players' column only reserves its position; it is filled from a single roster query.
+        for item in items:
+            item['players'] = rosters[item['id']]
+        return items
+
+
+def get_rosters(tournament_ids):
+    rosters = defaultdict(list)
+    for tournament_id, player_id in Tournament.players.through.objects.filter(
+        tournament_id__in=tournament_ids
+    ).order_by('player__name').values_list('tournament_id', 'player_id'):
+        rosters[tournament_id].append(player_id)
+    return rosters
+
+
+PLAYER_COLUMNS = LeanColumns(
+    id='id', name='name', rating='rating', created_at='created_at', updated_at='updated_at'
+)
+
+TOURNAMENT_COLUMNS = TournamentColumns(
+    id='id',
+    name='name',
+    status='status',
+    max_players='max_players',
+    players='id',
+    players_count='players_count',
+    created_at='created_at',
+    updated_at='updated_at',
+)
+
+GAME_COLUMNS = LeanColumns(
+    id='id',
+    tournament='tournament_id',
+    player1='player1_id',
+    player2='player2_id',
+    player1_name='player1__name',
+    player2_name='player2__name',
+    winner='winner_id',
+    winner_name='winner__name',
+    is_draw='is_draw',
+    round='round',
+    played_at='played_at',
+)
+
+LEADERBOARD_ENTRY_COLUMNS = LeanColumns(
+    player_id='player_id',
+    player_name='player_name',
+    points='points',
+    wins='wins',
+    draws='draws',
+    losses='losses',
+    games_played='games_played',
+)
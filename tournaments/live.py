@@ -0,0 +1,115 @@
+import asyncio
+import functools
+import json
+import threading
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+from .leaderboard import get_leaderboard_entries
+from .models import Tournament
+
+RESYNC = None
+
+
+def format_event(event, data, version=None):
+    lines = [f'event: {event}']
+    if version is not None:
+        lines.append(f'id: {version}')
+    lines.append(f'data: {json.dumps(data, separators=(",", ":"))}')
+    return '\n'.join(lines) + '\n\n'
+
+
+class Subscription:
+    def __init__(self, tournament_id, queue_size):
+        self.tournament_id = tournament_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client that cannot keep up skips the backlog and is sent a fresh snapshot instead.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InMemoryBroker:
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, tournament_id):
+        subscription = Subscription(tournament_id, self.queue_size)
+        with self._lock:
+            self._subscriptions.setdefault(tournament_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.tournament_id, set())
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.tournament_id, None)
+
+    def has_subscribers(self, tournament_id):
+        return tournament_id in self._subscriptions
+
+    def publish(self, tournament_id, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(tournament_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, message)
+            except RuntimeError:
+                self.unsubscribe(subscription)
+        return len(subscriptions)
+
+
+@functools.cache
+def get_broker():
+    return import_string(settings.TOURNAMENT_LIVE_BROKER)()
+
+
+def build_delta(tournament_id, player_ids=(), removed_ids=()):
+    tournament = Tournament.objects.filter(pk=tournament_id).values(
+        'status', 'players_count', 'played_games_count', 'version'
+    ).first()
+    if tournament is None:
+        return None
+
+    standings = []
+    if player_ids:
+        standings = list(get_leaderboard_entries(tournament_id).filter(player_id__in=player_ids))
+    players_count = tournament['players_count']
+    return tournament['version'], {
+        'tournament_id': tournament_id,
+        'status': tournament['status'],
+        'total_players': players_count,
+        'total_games_played': tournament['played_games_count'],
+        'total_expected_games': (players_count * (players_count - 1)) // 2,
+        'standings': standings,
+        'removed': sorted(removed_ids),
+    }
+
+
+def publish_delta(tournament_id, player_ids=(), removed_ids=()):
+    broker = get_broker()
+    if not broker.has_subscribers(tournament_id):
+        return
+
+    delta = build_delta(tournament_id, player_ids, removed_ids)
+    if delta is not None:
+        version, data = delta
+        broker.publish(tournament_id, (version, format_event('delta', data, version)))
+
+
+def publish_on_commit(tournament_id, player_ids=(), removed_ids=()):
+    if get_broker().has_subscribers(tournament_id):
+        player_ids, removed_ids = set(player_ids), set(removed_ids)
+        transaction.on_commit(lambda: publish_delta(tournament_id, player_ids, removed_ids))
@@ -0,0 +1,163 @@
+import asyncio
+import json
+import subprocess
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from tournaments import urls
+from tournaments.benchmarks import (
+    benchmark_client, check_status, http_get, run_concurrently, run_threaded, summarize
+)
+from tournaments.models import Player, Tournament, Game
+
+
+SKIPPED_ENDPOINTS = {
+    'player-import': 'write only',
+    'tournament-add-player': 'write only',
+    'tournament-add-players': 'write only',
+    'tournament-remove-player': 'write only',
+    'tournament-schedule': 'write only',
+    'tournament-leaderboard-live': 'event stream',
+    'game-bulk-create': 'write only',
+    'game-result': 'write only',
+}
+
+QUERY_VARIANTS = {
+    'game-list': ['', '?tournament={tournament}', '?pagination=cursor'],
+    'async-game-list': ['?tournament={tournament}'],
+    'player-list': ['', '?pagination=cursor'],
+    'leaderboard-batch': ['?ids={tournament}', '?status=finished'],
+    'game-export': ['?tournament={tournament}', '?format=csv'],
+    'tournament-export': ['?tournament={tournament}', '?format=csv'],
+}
+
+
+def discover_endpoints(sample):
+    for pattern in urls.urlpatterns:
+        if pattern.name in SKIPPED_ENDPOINTS:
+            continue
+        kwargs = {}
+        if 'pk' in pattern.pattern.converters:
+            kwargs['pk'] = sample[pattern.name.removeprefix('async-').split('-')[0]]
+        path = reverse(pattern.name, kwargs=kwargs)
+        for query in QUERY_VARIANTS.get(pattern.name, ['']):
+            yield pattern.name + query, path + query.format(**sample)
+
+
+def fetch(client, path):
+    response = client.get(path)
+    check_status(response.status_code, 'GET', path)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+async def afetch(client, path):
+    response = await client.get(path)
+    check_status(response.status_code, 'GET', path)
+    return response
+
+
+async def http_fetch(base_url, path):
+    return check_status(await http_get(base_url, path), 'GET', path)
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Measure latency, throughput and SQL queries per request for every read endpoint.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            help='Only run endpoints whose name contains this value (can be repeated).')
+        parser.add_argument('--base-url',
+                            help='Drive a running server (e.g. http://127.0.0.1:8000) with an async HTTP client.')
+        parser.add_argument('--output', help='Write the results as JSON to this file.')
+        parser.add_argument('--compare', help='Previous JSON results to compare against.')
+
+    def handle(self, *args, **options):
+        sample = {
+            'player': Player.objects.order_by('pk').values_list('pk', flat=True).first(),
+            'tournament': Tournament.objects.order_by('-pk').values_list('pk', flat=True).first(),
+            'game': Game.objects.order_by('-pk').values_list('pk', flat=True).first(),
+        }
+        if None in sample.values():
+            raise CommandError('The database has no games to benchmark; run seed_bench first.')
+
+        baseline = {}
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)['endpoints']
+
+        results = {}
+        self.stdout.write(
+            f'{"endpoint":<44}{"req/s":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+        )
+        for name, path in discover_endpoints(sample):
+            if options['endpoints'] and not any(endpoint in name for endpoint in options['endpoints']):
+                continue
+            result = results[name] = self.run(path, options)
+            line = (
+                f'{name:<44}{result["rps"]:>9.1f}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}'
+                f'{result["p99_ms"]:>9.2f}{result["queries"]:>9}'
+            )
+            if name in baseline:
+                line += f'  p50 {self.change(baseline[name]["p50_ms"], result["p50_ms"])}'
+                line += f'  req/s {self.change(baseline[name]["rps"], result["rps"])}'
+            self.stdout.write(line)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump({
+                    'meta': {
+                        'commit': current_commit(),
+                        'created_at': timezone.now().isoformat(),
+                        'database': connection.vendor,
+                        'base_url': options['base_url'],
+                        'requests': options['requests'],
+                        'concurrency': options['concurrency'],
+                        'dataset': {
+                            'players': Player.objects.count(),
+                            'tournaments': Tournament.objects.count(),
+                            'games': Game.objects.count(),
+                        },
+                    },
+                    'endpoints': results,
+                }, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {len(results)} results to {options["output"]}.'))
+
+    def change(self, before, after):
+        return f'{(after - before) / before:+.1%}' if before else 'n/a'
+
+    def run(self, path, options):
+        requests, concurrency, base_url = options['requests'], options['concurrency'], options['base_url']
+
+        # Queries are counted on a second sequential request so they reflect warm caches.
+        fetch(benchmark_client(), path)
+        with CaptureQueriesContext(connection) as queries:
+            response = fetch(benchmark_client(), path)
+        query_count = len(queries)
+
+        if base_url:
+            latencies, elapsed = asyncio.run(
+                run_concurrently(lambda: http_fetch(base_url, path), requests, concurrency)
+            )
+        elif resolve(path.split('?')[0]).func.view_class.view_is_async:
+            client = benchmark_client(asynchronous=True)
+            latencies, elapsed = asyncio.run(run_concurrently(lambda: afetch(client, path), requests, concurrency))
+        else:
+            client = benchmark_client()
+            latencies, elapsed = run_threaded(lambda: fetch(client, path), requests, concurrency)
+
+        return dict(summarize(latencies, elapsed), queries=query_count, status=response.status_code)
@@ -0,0 +1,61 @@
+import asyncio
+from django.core.management.base import BaseCommand, CommandError
+from tournaments.benchmarks import benchmark_client, check_status, http_get, run_concurrently, run_threaded, summarize
+from tournaments.models import Tournament
+
+
+ENDPOINTS = [
+    ('tournament detail', '/api/tournaments/{pk}/', '/api/async/tournaments/{pk}/'),
+    ('leaderboard', '/api/tournaments/{pk}/leaderboard/', '/api/async/tournaments/{pk}/leaderboard/'),
+    ('games by tournament', '/api/games/?tournament={pk}', '/api/async/games/?tournament={pk}'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync and async read endpoints under concurrent load.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tournament', type=int, help='Tournament to read (defaults to the latest one).')
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--base-url',
+                            help='Benchmark a running server (e.g. http://127.0.0.1:8000) instead of in-process.')
+
+    def handle(self, *args, **options):
+        tournament = (
+            Tournament.objects.filter(pk=options['tournament']) if options['tournament'] else Tournament.objects
+        ).order_by('-created_at').first()
+        if tournament is None:
+            raise CommandError('No tournament to benchmark; run seed_bench or pass --tournament.')
+
+        self.stdout.write(f'{"endpoint":<22}{"mode":<7}{"req/s":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+        for name, sync_path, async_path in ENDPOINTS:
+            for mode, path in (('sync', sync_path), ('async', async_path)):
+                result = self.run(path.format(pk=tournament.pk), options)
+                self.stdout.write(
+                    f'{name:<22}{mode:<7}{result["rps"]:>10.1f}{result["p50_ms"]:>10.2f}'
+                    f'{result["p95_ms"]:>10.2f}{result["p99_ms"]:>10.2f}'
+                )
+
+    def run(self, path, options):
+        requests, concurrency, base_url = options['requests'], options['concurrency'], options['base_url']
+
+        if base_url:
+            async def call():
+                check_status(await http_get(base_url, path), 'GET', path)
+
+            latencies, elapsed = asyncio.run(run_concurrently(call, requests, concurrency))
+        elif path.startswith('/api/async/'):
+            client = benchmark_client(asynchronous=True)
+
+            async def call():
+                check_status((await client.get(path)).status_code, 'GET', path)
+
+            latencies, elapsed = asyncio.run(run_concurrently(call, requests, concurrency))
+        else:
+            client = benchmark_client()
+            latencies, elapsed = run_threaded(
+                lambda: check_status(client.get(path).status_code, 'GET', path), requests, concurrency
+            )
+
+        return summarize(latencies, elapsed)
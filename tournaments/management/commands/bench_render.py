@@ -0,0 +1,69 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from rest_framework.renderers import JSONRenderer
+from tournaments.benchmarks import cpu_time_per_call
+from tournaments.lean import GAME_COLUMNS, LEADERBOARD_ENTRY_COLUMNS, PLAYER_COLUMNS, TOURNAMENT_COLUMNS
+from tournaments.leaderboard import build_leaderboard, get_leaderboard_entries
+from tournaments.models import Player, Tournament
+from tournaments.renderers import FastJSONRenderer, orjson
+from tournaments.serializers import (
+    GameSerializer,
+    PlayerSerializer,
+    TournamentLeaderboardSerializer,
+    TournamentSerializer,
+)
+from tournaments.views import GAME_QUERYSET, TOURNAMENT_QUERYSET
+
+
+class Command(BaseCommand):
+    help = 'Compare the CPU time of building and rendering one page with the serializers and with the lean path.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100, help='Rows per page.')
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        rows, iterations = options['rows'], options['iterations']
+        tournament = Tournament.objects.annotate(entries=Count('standings')).order_by('-entries').first()
+        if tournament is None:
+            raise CommandError('The database has no tournaments to benchmark; run seed_bench first.')
+
+        pages = [
+            ('players', Player.objects.order_by('name', 'id')[:rows], PlayerSerializer, PLAYER_COLUMNS),
+            ('tournaments', TOURNAMENT_QUERYSET.order_by('-created_at', '-id')[:rows], TournamentSerializer,
+             TOURNAMENT_COLUMNS),
+            ('games', GAME_QUERYSET.order_by('-played_at', '-id')[:rows], GameSerializer, GAME_COLUMNS),
+        ]
+        serializer_renderer, lean_renderer = JSONRenderer(), FastJSONRenderer()
+
+        self.stdout.write(f'JSON encoder for the lean path: {"orjson" if orjson else "json (orjson not installed)"}')
+        self.stdout.write(
+            f'{"page":<14}{"rows":>6}{"serializer µs":>16}{"lean µs":>10}{"saved":>9}{"identical":>11}'
+        )
+        for name, queryset, serializer_class, columns in pages:
+            self.report(
+                name,
+                queryset.count(),
+                lambda: serializer_renderer.render(serializer_class(queryset.all(), many=True).data),
+                lambda: lean_renderer.render(columns.build(columns.values(queryset.all()))),
+                iterations,
+            )
+        self.report(
+            'leaderboard',
+            tournament.entries,
+            lambda: serializer_renderer.render(TournamentLeaderboardSerializer(build_leaderboard(tournament)).data),
+            lambda: lean_renderer.render(build_leaderboard(
+                tournament, LEADERBOARD_ENTRY_COLUMNS.build(get_leaderboard_entries(tournament.id))
+            )),
+            iterations,
+        )
+
+    def report(self, name, rows, serialized, lean, iterations):
+        identical = serialized() == lean()
+        before = cpu_time_per_call(serialized, iterations) * 1e6
+        after = cpu_time_per_call(lean, iterations) * 1e6
+        line = (
+            f'{name:<14}{rows:>6}{before:>16.0f}{after:>10.0f}{(before - after) / before:>9.1%}'
+            f'{"yes" if identical else "NO":>11}'
+        )
+        self.stdout.write(line if identical else self.style.ERROR(line))
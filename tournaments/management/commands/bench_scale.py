@@ -0,0 +1,73 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tournaments.benchmarks import benchmark_client, check_status, seed_dataset, summarize
+from tournaments.models import Player, Tournament, Game
+from tournaments.scheduling import schedule_round_robin
+
+
+class Command(BaseCommand):
+    help = 'Seed one tournament per roster size and show that per-request latency and SQL queries stay flat.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='5,50,500', help='Comma-separated roster sizes.')
+        parser.add_argument('--requests', type=int, default=20, help='Requests per operation and size.')
+        parser.add_argument('--completion', type=float, default=0.5,
+                            help='Fraction of each round robin that is already played.')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f'{"players":>8}{"games":>9}  {"operation":<20}{"p50 ms":>9}{"p95 ms":>9}{"queries":>9}'
+        )
+        for size in [int(size) for size in options['sizes'].split(',')]:
+            for line in self.run(size, options):
+                self.stdout.write(line)
+
+    def run(self, size, options):
+        requests = options['requests']
+        seed_dataset(
+            players=size + requests, tournaments=1, players_per_tournament=size,
+            completion=options['completion'], seed=options['seed'],
+        )
+        tournament = Tournament.objects.order_by('-pk').first()
+        Tournament.objects.filter(pk=tournament.pk).update(max_players=size + requests)
+        schedule_round_robin(tournament.id)
+
+        newest = Player.objects.order_by('-pk').values_list('pk', flat=True)[:size + requests]
+        outsiders = Player.objects.filter(pk__in=list(newest)).exclude(tournaments=tournament)
+        fixtures = Game.objects.filter(tournament=tournament).pending().order_by('id')
+        played = Game.objects.filter(tournament=tournament).played().count()
+        base = f'/api/tournaments/{tournament.pk}'
+
+        operations = [
+            ('record result', [
+                ('post', f'/api/games/{game_id}/result/', {'winner': winner_id})
+                for game_id, winner_id in fixtures.values_list('id', 'player1_id')[:requests]
+            ]),
+            ('add player', [
+                ('post', f'{base}/add_player/', {'player_id': player_id})
+                for player_id in outsiders.values_list('pk', flat=True)[:requests]
+            ]),
+            ('tournament detail', [('get', f'{base}/', None)] * requests),
+            ('leaderboard (cold)', [('get', f'{base}/leaderboard/', None)] * requests),
+        ]
+
+        client = benchmark_client()
+        for name, calls in operations:
+            latencies, queries = [], 0
+            for method, path, data in calls:
+                if name.endswith('(cold)'):
+                    # A version bump is how writes invalidate cached leaderboards.
+                    Tournament.objects.filter(pk=tournament.pk).bump_version()
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = getattr(client, method)(path, data)
+                    latencies.append(time.perf_counter() - started)
+                queries = max(queries, len(captured))
+                check_status(response.status_code, method.upper(), path)
+            result = summarize(latencies, sum(latencies))
+            yield (
+                f'{size:>8}{played:>9}  {name:<20}{result["p50_ms"]:>9.2f}{result["p95_ms"]:>9.2f}{queries:>9}'
+            )
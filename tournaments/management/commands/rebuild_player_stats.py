@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from tournaments.standings import rebuild_player_stats
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-player career statistics from the standings table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted rows without writing anything.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total, drifted = rebuild_player_stats(dry_run=options['dry_run'], batch_size=options['batch_size'])
+
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} of {total} player stats rows have drifted.')
+        elif drifted:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} player stats rows ({drifted} had drifted).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'All {total} player stats rows are up to date.'))
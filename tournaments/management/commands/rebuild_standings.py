@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from tournaments.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the materialized standings table from recorded games.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tournament', type=int, action='append', dest='tournament_ids',
+                            help='Only rebuild the given tournament (can be repeated).')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report drifted rows without writing anything.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        total, drifted = rebuild_standings(
+            tournament_ids=options['tournament_ids'],
+            dry_run=options['dry_run'],
+            batch_size=options['batch_size'],
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f'{drifted} of {total} standings rows have drifted.')
+        elif drifted:
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {total} standings rows ({drifted} had drifted).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'All {total} standings rows are up to date.'))
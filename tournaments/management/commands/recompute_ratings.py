@@ -0,0 +1,20 @@
+import time
+from django.core.management.base import BaseCommand
+from tournaments.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Replay every recorded game in played_at order and rebuild all player Elo ratings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--k-factor', type=float, default=None,
+                            help='K-factor to replay with (defaults to the ELO_K_FACTOR setting).')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        games, players = recompute_ratings(k_factor=options['k_factor'], batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Replayed {games} games for {players} players in {elapsed:.2f}s.'
+        ))
@@ -0,0 +1,49 @@
+import time
+from django.core.management.base import BaseCommand
+from tournaments.standings import TOURNAMENT_STATE_FIELDS, reconcile_tournaments
+
+
+class Command(BaseCommand):
+    help = 'Recompute every tournament\'s player and game counters and status with set-based updates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Print what would change without writing anything.')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Tournaments read and updated per statement.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        started = time.perf_counter()
+        total = drifted = chunks = 0
+        scan_seconds = update_seconds = 0.0
+
+        for scanned, rows, scan_time, update_time in reconcile_tournaments(dry_run, options['chunk_size']):
+            total += scanned
+            drifted += len(rows)
+            chunks += 1
+            scan_seconds += scan_time
+            update_seconds += update_time
+            if dry_run or options['verbosity'] > 1:
+                for row in rows:
+                    self.stdout.write(self.describe(row))
+
+        elapsed = time.perf_counter() - started
+        if dry_run:
+            self.stdout.write(f'{drifted} of {total} tournaments have drifted.')
+        elif drifted:
+            self.stdout.write(self.style.SUCCESS(f'Reconciled {drifted} of {total} tournaments.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'All {total} tournaments are up to date.'))
+        self.stdout.write(
+            f'{chunks} chunks in {elapsed:.3f}s (scan {scan_seconds:.3f}s, update {update_seconds:.3f}s, '
+            f'{total / elapsed if elapsed else 0:.0f} tournaments/s)'
+        )
+
+    def describe(self, row):
+        changes = ', '.join(
+            f'{field} {row[field]} -> {row[f"expected_{field}"]}'
+            for field in TOURNAMENT_STATE_FIELDS
+            if row[field] != row[f'expected_{field}']
+        )
+        return f'#{row["pk"]} {row["name"]}: {changes}'
@@ -0,0 +1,44 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from tournaments.benchmarks import seed_dataset
+from tournaments.ratings import recompute_ratings
+
+
+class Command(BaseCommand):
+    help = 'Bulk-generate players, tournaments and round-robin games for benchmarking.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--players', type=int, default=1000)
+        parser.add_argument('--tournaments', type=int, default=200)
+        parser.add_argument('--players-per-tournament', type=int, default=5)
+        parser.add_argument('--completion', type=float, default=1.0,
+                            help='Fraction of each round robin that has been played (0 to 1).')
+        parser.add_argument('--draw-ratio', type=float, default=0.2)
+        parser.add_argument('--seed', type=int, help='Random seed, for reproducible datasets.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--skip-ratings', action='store_true',
+                            help='Leave ratings at their initial value instead of replaying every game.')
+
+    def handle(self, *args, **options):
+        if options['players'] < 2 or options['players_per_tournament'] < 2:
+            raise CommandError('At least two players are needed to play a game.')
+        if not 0 <= options['completion'] <= 1:
+            raise CommandError('--completion must be between 0 and 1.')
+
+        started = time.perf_counter()
+        players, tournaments, games = seed_dataset(
+            players=options['players'],
+            tournaments=options['tournaments'],
+            players_per_tournament=options['players_per_tournament'],
+            completion=options['completion'],
+            draw_ratio=options['draw_ratio'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+        )
+        if not options['skip_ratings']:
+            recompute_ratings(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {players} players, {tournaments} tournaments and {games} games '
+            f'in {time.perf_counter() - started:.2f}s.'
+        ))
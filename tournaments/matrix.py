@@ -0,0 +1,47 @@
+from .cache import get_or_build
+from .models import Tournament, Game
+
+WIN, LOSS, DRAW, SELF = 'W', 'L', 'D', '-'
+
+
+def build_matrix(tournament):
+    roster = Tournament.players.through.objects.filter(tournament_id=tournament.id).order_by(
+        'player__name', 'player_id'
+    ).values_list('player_id', 'player__name')
+    players = [{'id': player_id, 'name': name} for player_id, name in roster]
+    index = {player['id']: position for position, player in enumerate(players)}
+
+    size = len(players)
+    results = [[None] * size for _ in range(size)]
+    for position in range(size):
+        results[position][position] = SELF
+
+    games = Game.objects.filter(tournament_id=tournament.id).order_by().values_list(
+        'player1_id', 'player2_id', 'winner_id', 'is_draw'
+    )
+    for player1_id, player2_id, winner_id, is_draw in games:
+        row, column = index.get(player1_id), index.get(player2_id)
+        if row is None or column is None:
+            continue
+        if is_draw:
+            results[row][column] = results[column][row] = DRAW
+        elif winner_id is not None:
+            results[row][column] = WIN if winner_id == player1_id else LOSS
+            results[column][row] = LOSS if winner_id == player1_id else WIN
+
+    return {
+        'tournament_id': tournament.id,
+        'status': tournament.status,
+        'players': players,
+        'results': results,
+        'remaining_pairings': [
+            [players[row]['id'], players[column]['id']]
+            for row in range(size)
+            for column in range(row + 1, size)
+            if results[row][column] is None
+        ],
+    }
+
+
+def get_matrix(tournament):
+    return get_or_build('matrix', tournament, build_matrix)
@@ -0,0 +1,222 @@
+import bisect
+import contextvars
+import logging
+import random
+import threading
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .cache import stats as cache_stats
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+current_recorder = contextvars.ContextVar('current_recorder', default=None)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = 0.0
+        self.slowest_sql = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.count += 1
+            self.duration += duration
+            if duration > self.slowest:
+                self.slowest = duration
+                self.slowest_sql = sql
+
+
+def record_queries(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # Installed once per connection wrapper so queries are seen in whichever thread runs them,
+    # including the sync_to_async threads that serve async views.
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket', dict(labels, le=str(bound)), cumulative
+        yield f'{name}_sum', labels, self.sum
+        yield f'{name}_count', labels, cumulative
+
+
+class RequestMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = {}
+            self._slow_requests = {}
+            self._views = {}
+
+    def record(self, view, method, status_code, duration, recorder=None, slow=False):
+        with self._lock:
+            key = (view, method, str(status_code))
+            self._requests[key] = self._requests.get(key, 0) + 1
+            if slow:
+                self._slow_requests[view] = self._slow_requests.get(view, 0) + 1
+            if recorder is None:
+                return
+
+            metrics = self._views.get(view)
+            if metrics is None:
+                metrics = self._views[view] = {
+                    'duration': Histogram(DURATION_BUCKETS),
+                    'db_duration': Histogram(DURATION_BUCKETS),
+                    'queries': Histogram(QUERY_COUNT_BUCKETS),
+                    'slowest_query': 0.0,
+                }
+            metrics['duration'].observe(duration)
+            metrics['db_duration'].observe(recorder.duration)
+            metrics['queries'].observe(recorder.count)
+            metrics['slowest_query'] = max(metrics['slowest_query'], recorder.slowest)
+
+    def render(self):
+        families = [
+            ('tournaments_http_requests_total', 'counter', 'Requests served, sampled or not.'),
+            ('tournaments_http_slow_requests_total', 'counter', 'Requests slower than METRICS_SLOW_REQUEST_MS.'),
+            ('tournaments_http_request_duration_seconds', 'histogram', 'Wall time of sampled requests.'),
+            ('tournaments_db_duration_seconds', 'histogram', 'Total database time of sampled requests.'),
+            ('tournaments_db_queries', 'histogram', 'SQL queries per sampled request.'),
+            ('tournaments_db_slowest_query_seconds', 'gauge', 'Slowest single query seen per view.'),
+            ('tournaments_cache_requests_total', 'counter', 'Tournament cache lookups.'),
+        ]
+        samples = {name: [] for name, _, _ in families}
+
+        with self._lock:
+            for (view, method, status_code), count in sorted(self._requests.items()):
+                samples['tournaments_http_requests_total'].append(
+                    ('tournaments_http_requests_total', {'view': view, 'method': method, 'status': status_code}, count)
+                )
+            for view, count in sorted(self._slow_requests.items()):
+                samples['tournaments_http_slow_requests_total'].append(
+                    ('tournaments_http_slow_requests_total', {'view': view}, count)
+                )
+            for view, metrics in sorted(self._views.items()):
+                labels = {'view': view}
+                samples['tournaments_http_request_duration_seconds'].extend(
+                    metrics['duration'].samples('tournaments_http_request_duration_seconds', labels)
+                )
+                samples['tournaments_db_duration_seconds'].extend(
+                    metrics['db_duration'].samples('tournaments_db_duration_seconds', labels)
+                )
+                samples['tournaments_db_queries'].extend(metrics['queries'].samples('tournaments_db_queries', labels))
+                samples['tournaments_db_slowest_query_seconds'].append(
+                    ('tournaments_db_slowest_query_seconds', labels, metrics['slowest_query'])
+                )
+
+        for cache, counters in sorted(cache_stats.snapshot().items()):
+            for result in ('hits', 'misses'):
+                samples['tournaments_cache_requests_total'].append(
+                    ('tournaments_cache_requests_total', {'cache': cache, 'result': result}, counters[result])
+                )
+
+        lines = []
+        for name, kind, description in families:
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for sample_name, labels, value in samples[name]:
+                label_text = ','.join(f'{key}="{escape_label(value)}"' for key, value in labels.items())
+                lines.append(f'{sample_name}{{{label_text}}} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_metrics = RequestMetrics()
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = settings.METRICS_SAMPLE_RATE
+        self.slow_request_seconds = settings.METRICS_SLOW_REQUEST_MS / 1000
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token is not None:
+                current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token is not None:
+                current_recorder.reset(token)
+        return self.finish(request, response, recorder, started)
+
+    def start(self):
+        recorder = token = None
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            recorder = QueryRecorder()
+            token = current_recorder.set(recorder)
+        return recorder, token, time.perf_counter()
+
+    def finish(self, request, response, recorder, started):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        slow = duration >= self.slow_request_seconds
+        request_metrics.record(view, request.method, response.status_code, duration, recorder, slow)
+
+        timings = [f'total;dur={duration * 1000:.2f}']
+        if recorder is not None:
+            timings.insert(0, f'db;desc="{recorder.count} queries";dur={recorder.duration * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(timings)
+
+        if slow:
+            if recorder is None:
+                logger.warning('Slow request %s %s (%s): %.0f ms', request.method, request.path, view, duration * 1000)
+            else:
+                logger.warning(
+                    'Slow request %s %s (%s): %.0f ms, %d queries in %.0f ms, slowest %.0f ms: %s',
+                    request.method, request.path, view, duration * 1000, recorder.count, recorder.duration * 1000,
+                    recorder.slowest * 1000, recorder.slowest_sql,
+                )
+        return response
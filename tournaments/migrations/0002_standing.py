@@ -0,0 +1,63 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_standings(apps, schema_editor):
+    Tournament = apps.get_model('tournaments', 'Tournament')
+    Game = apps.get_model('tournaments', 'Game')
+    Standing = apps.get_model('tournaments', 'Standing')
+
+    standings = {
+        (tournament_id, player_id): Standing(tournament_id=tournament_id, player_id=player_id)
+        for tournament_id, player_id in Tournament.players.through.objects.values_list('tournament_id', 'player_id')
+    }
+
+    played = Game.objects.filter(models.Q(winner__isnull=False) | models.Q(is_draw=True))
+    for game in played.values('tournament_id', 'player1_id', 'player2_id', 'winner_id', 'is_draw').iterator():
+        for player_id in (game['player1_id'], game['player2_id']):
+            standing = standings.get((game['tournament_id'], player_id))
+            if standing is None:
+                continue
+            standing.games_played += 1
+            if game['is_draw']:
+                standing.draws += 1
+            elif game['winner_id'] == player_id:
+                standing.wins += 1
+            else:
+                standing.losses += 1
+
+    for standing in standings.values():
+        standing.points = standing.wins * 2 + standing.draws
+
+    Standing.objects.bulk_create(standings.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Standing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('games_played', models.IntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.player')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='tournaments.tournament')),
+            ],
+            options={
+                'ordering': ['tournament', '-points'],
+                'indexes': [models.Index(fields=['tournament', '-points'], name='standing_tournament_points')],
+                'unique_together': {('tournament', 'player')},
+            },
+        ),
+        migrations.RunPython(populate_standings, migrations.RunPython.noop),
+    ]
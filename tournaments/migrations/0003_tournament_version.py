@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0002_standing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
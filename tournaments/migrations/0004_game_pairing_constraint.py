@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:35
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+
+def check_duplicate_pairings(apps, schema_editor):
+    # The old application-level check was racy, so an existing database can already hold repeated pairings.
+    # Which of them is the real result is for a person to decide, so they are reported instead of deleted.
+    Game = apps.get_model('tournaments', 'Game')
+    games = Game.objects.annotate(
+        low=django.db.models.functions.comparison.Least('player1', 'player2'),
+        high=django.db.models.functions.comparison.Greatest('player1', 'player2'),
+    )
+    duplicates = list(
+        games.order_by().values('tournament_id', 'low', 'high').annotate(games=models.Count('pk')).filter(games__gt=1)
+    )
+    if not duplicates:
+        return
+
+    lines = []
+    for pairing in duplicates[:20]:
+        ids = games.filter(
+            tournament_id=pairing['tournament_id'], low=pairing['low'], high=pairing['high']
+        ).order_by('pk').values_list('pk', flat=True)
+        lines.append(
+            f'  tournament {pairing["tournament_id"]}, players {pairing["low"]} and {pairing["high"]}: '
+            f'games {", ".join(map(str, ids))}'
+        )
+    if len(duplicates) > len(lines):
+        lines.append(f'  ... and {len(duplicates) - len(lines)} more')
+    raise RuntimeError(
+        f'Cannot add the unique_game_pairing constraint: {len(duplicates)} pairing(s) have more than one game.\n'
+        + '\n'.join(lines)
+        + '\nDelete the extra games so that each pairing is played once per tournament, run migrate again, '
+        'then run rebuild_standings to drop them from the standings.'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0003_tournament_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['tournament', 'winner'], name='game_tournament_winner'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['tournament', 'is_draw'], name='game_tournament_is_draw'),
+        ),
+        migrations.RunPython(check_duplicate_pairings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='game',
+            constraint=models.UniqueConstraint(models.F('tournament'), django.db.models.functions.comparison.Least('player1', 'player2'), django.db.models.functions.comparison.Greatest('player1', 'player2'), name='unique_game_pairing', violation_error_message='These players have already played against each other in this tournament.'),
+        ),
+    ]
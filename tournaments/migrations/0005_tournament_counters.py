@@ -0,0 +1,43 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:37
+
+from django.db import migrations, models
+import django.db.models.functions
+
+
+def populate_counters(apps, schema_editor):
+    Tournament = apps.get_model('tournaments', 'Tournament')
+    Game = apps.get_model('tournaments', 'Game')
+
+    roster = Tournament.players.through.objects.filter(
+        tournament_id=models.OuterRef('pk')
+    ).order_by().values('tournament_id').annotate(total=models.Count('pk')).values('total')
+    played_games = Game.objects.filter(
+        models.Q(winner__isnull=False) | models.Q(is_draw=True),
+        tournament_id=models.OuterRef('pk'),
+    ).order_by().values('tournament_id').annotate(total=models.Count('pk')).values('total')
+
+    Tournament.objects.update(
+        players_count=models.functions.Coalesce(models.Subquery(roster), 0),
+        played_games_count=models.functions.Coalesce(models.Subquery(played_games), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0004_game_pairing_constraint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='played_games_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='players_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0005_tournament_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['-played_at', '-id'], name='game_played_at_id'),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['tournament', '-played_at', '-id'], name='game_tournament_played_at_id'),
+        ),
+        migrations.AddIndex(
+            model_name='tournament',
+            index=models.Index(fields=['-created_at', '-id'], name='tournament_created_at_id'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import tournaments.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0006_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='rating',
+            field=models.FloatField(default=tournaments.models.initial_rating, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(fields=['-rating', 'id'], name='player_rating_id'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-18 11:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0007_player_rating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='round',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='game',
+            index=models.Index(fields=['tournament', 'round'], name='game_tournament_round'),
+        ),
+    ]
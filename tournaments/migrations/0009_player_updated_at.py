@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0008_game_round'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_player_stats(apps, schema_editor):
+    Player = apps.get_model('tournaments', 'Player')
+    Standing = apps.get_model('tournaments', 'Standing')
+    PlayerStats = apps.get_model('tournaments', 'PlayerStats')
+
+    stats = {
+        player_id: PlayerStats(player_id=player_id)
+        for player_id in Player.objects.order_by().values_list('id', flat=True).iterator()
+    }
+
+    fields = ['wins', 'draws', 'losses', 'points', 'games_played']
+    rows = Standing.objects.order_by().values('player_id').annotate(
+        tournaments_entered=models.Count('pk'),
+        **{field: models.Sum(field) for field in fields},
+    )
+    for row in rows.iterator():
+        player_stats = stats[row.pop('player_id')]
+        for field, value in row.items():
+            setattr(player_stats, field, value)
+        if player_stats.games_played:
+            player_stats.win_rate = player_stats.wins / player_stats.games_played
+
+    PlayerStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0009_player_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerStats',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='tournaments.player')),
+                ('tournaments_entered', models.IntegerField(default=0)),
+                ('games_played', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('draws', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('points', models.IntegerField(default=0)),
+                ('win_rate', models.FloatField(default=0.0)),
+            ],
+            options={
+                'verbose_name_plural': 'player stats',
+                'indexes': [models.Index(fields=['points', 'player'], name='player_stats_points'), models.Index(fields=['wins', 'player'], name='player_stats_wins'), models.Index(fields=['win_rate', 'player'], name='player_stats_win_rate'), models.Index(fields=['games_played', 'player'], name='player_stats_games_played'), models.Index(fields=['tournaments_entered', 'player'], name='player_stats_tournaments')],
+            },
+        ),
+        migrations.RunPython(populate_player_stats, migrations.RunPython.noop),
+    ]
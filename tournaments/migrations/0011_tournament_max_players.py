@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 12:14
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0010_playerstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='max_players',
+            field=models.PositiveIntegerField(default=5, validators=[django.core.validators.MinValueValidator(2)]),
+        ),
+    ]
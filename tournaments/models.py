@@ -1,19 +1,133 @@
-from django.db import models
+from collections import Counter
+from django.conf import settings
+from django.db import IntegrityError, models, router, transaction
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, Now
+from django.db.models.lookups import Exact, GreaterThan, GreaterThanOrEqual, LessThan, LessThanOrEqual
 from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
+from django.dispatch import Signal
+from django.utils import timezone
+
+
+DUPLICATE_PAIRING_MESSAGE = 'These players have already played against each other in this tournament.'
+
+standings_changed = Signal()
+
+
+def elo_expected_score(rating, opponent_rating):
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+class PlayerManager(models.Manager):
+    def rate_games(self, games, k_factor=None):
+        k_factor = settings.ELO_K_FACTOR if k_factor is None else k_factor
+        games = [game for game in games if game.is_played]
+        if not games:
+            return
+
+        player_ids = {player_id for game in games for player_id in (game.player1_id, game.player2_id)}
+        ratings = dict(
+            self.select_for_update().filter(id__in=player_ids).order_by('id').values_list('id', 'rating')
+        )
+        for game in games:
+            delta = k_factor * (game.elo_score - elo_expected_score(ratings[game.player1_id], ratings[game.player2_id]))
+            ratings[game.player1_id] += delta
+            ratings[game.player2_id] -= delta
+
+        updated_at = timezone.now()
+        self.bulk_update(
+            [Player(id=player_id, rating=rating, updated_at=updated_at) for player_id, rating in ratings.items()],
+            ['rating', 'updated_at']
+        )
+
+
+def initial_rating():
+    # A callable keeps the migration state independent of the ELO_INITIAL_RATING setting.
+    return settings.ELO_INITIAL_RATING
 
 
 class Player(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    rating = models.FloatField(default=initial_rating, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PlayerManager()
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if adding:
+            PlayerStats.objects.create(player=self)
+        else:
+            # Leaderboards and matrices show player names, so their cached copies and ETags have to move on.
+            Tournament.objects.filter(players=self).bump_version()
+
     class Meta:
         ordering = ['name']
+        indexes = [
+            models.Index(fields=['-rating', 'id'], name='player_rating_id'),
+        ]
+
+
+def status_case(players_count, played_games_count):
+    total_expected_games = players_count * (players_count - 1) / 2
+    return models.Case(
+        models.When(LessThan(players_count, 2), then=models.Value('planning')),
+        models.When(Exact(played_games_count, 0), then=models.Value('planning')),
+        models.When(GreaterThanOrEqual(played_games_count, total_expected_games), then=models.Value('finished')),
+        default=models.Value('started'),
+        output_field=models.CharField(),
+    )
+
+
+class TournamentQuerySet(models.QuerySet):
+    def bump_version(self):
+        return self.update(version=models.F('version') + 1, updated_at=Now())
+
+    def refresh_status(self):
+        return self.update(status=status_case(models.F('players_count'), models.F('played_games_count')))
+
+    def record_games(self, delta):
+        played_games_count = models.F('played_games_count') + delta
+        return self.update(
+            played_games_count=played_games_count,
+            status=status_case(models.F('players_count'), played_games_count),
+            version=models.F('version') + 1,
+            updated_at=Now(),
+        )
+
+    def record_players(self, delta):
+        players_count = models.F('players_count') + delta
+        return self.update(
+            players_count=players_count,
+            status=status_case(players_count, models.F('played_games_count')),
+            version=models.F('version') + 1,
+            updated_at=Now(),
+        )
+
+    def sync_players_count(self):
+        roster = Tournament.players.through.objects.filter(
+            tournament_id=models.OuterRef('pk')
+        ).order_by().values('tournament_id').annotate(total=models.Count('pk')).values('total')
+        players_count = Coalesce(models.Subquery(roster), 0)
+        return self.update(
+            players_count=players_count,
+            status=status_case(players_count, models.F('played_games_count')),
+            version=models.F('version') + 1,
+            updated_at=Now(),
+        )
 
 
 class Tournament(models.Model):
+    COUNTER_FIELDS = ['players_count', 'played_games_count']
+    # Status follows the counters and is only moved by the same conditional UPDATEs.
+    DERIVED_FIELDS = [*COUNTER_FIELDS, 'status']
+    DEFAULT_MAX_PLAYERS = 5
+
     STATUS_CHOICES = [
         ('planning', 'Planning'),
         ('started', 'Started'),
@@ -23,43 +137,119 @@ class Tournament(models.Model):
     name = models.CharField(max_length=200)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='planning')
     players = models.ManyToManyField(Player, related_name='tournaments', blank=True)
+    max_players = models.PositiveIntegerField(default=DEFAULT_MAX_PLAYERS, validators=[MinValueValidator(2)])
+    players_count = models.PositiveIntegerField(default=0, editable=False)
+    played_games_count = models.PositiveIntegerField(default=0, editable=False)
+    version = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TournamentQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if self.pk is None or self._state.adding:
+            return super().save(*args, **kwargs)
+
+        self.version = models.F('version') + 1
+        if kwargs.get('update_fields') is None:
+            # The counters and status are only ever moved by atomic updates, never by writing back a stale copy.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        else:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'version', 'updated_at'}
+        super().save(*args, **kwargs)
+        # Replace the F() expression with the stored value so cache keys and ETags built from this instance are valid,
+        # and pick up derived fields that other writers may have moved since this instance was loaded.
+        self.refresh_from_db(
+            using=kwargs.get('using') or router.db_for_write(Tournament, instance=self),
+            fields=['version', 'updated_at', *self.DERIVED_FIELDS],
+        )
+
     def clean(self):
-        if self.players.count() > 5:
-            raise ValidationError('A tournament can have a maximum of 5 participants.')
+        if self.pk is not None and self.players_count > self.max_players:
+            raise ValidationError(f'A tournament can have a maximum of {self.max_players} participants.')
+
+    def lock_roster(self, joining=0, roster_size=None, max_players=None):
+        # A single conditional UPDATE takes the row lock and checks the cap against the committed roster,
+        # so concurrent roster changes to this tournament queue up while other tournaments are unaffected.
+        # roster_size replaces the roster instead of growing it, and max_players checks against a new cap.
+        tournaments = Tournament.objects.filter(pk=self.pk)
+        if joining or roster_size is not None or max_players is not None:
+            size = models.F('players_count') + joining if roster_size is None else models.Value(roster_size)
+            cap = models.F('max_players') if max_players is None else models.Value(max_players)
+            tournaments = tournaments.filter(LessThanOrEqual(size, cap))
+        return tournaments.bump_version()
+
+    def add_players(self, player_ids):
+        player_ids = set(player_ids)
+        with transaction.atomic():
+            if not self.lock_roster(joining=len(player_ids)):
+                if len(player_ids) == 1:
+                    raise ValidationError(f'Tournament already has the maximum of {self.max_players} participants.')
+                raise ValidationError(
+                    f'Adding {len(player_ids)} players would exceed the maximum of {self.max_players} participants.'
+                )
+
+            players = Player.objects.filter(id__in=player_ids).annotate(
+                is_member=models.Exists(
+                    Tournament.players.through.objects.filter(tournament_id=self.pk, player_id=models.OuterRef('pk'))
+                )
+            ).order_by('name')
+            players = list(players.values_list('id', 'name', 'is_member'))
+            missing = player_ids - {player_id for player_id, _, _ in players}
+            if missing:
+                raise ValidationError(f'Player does not exist: {", ".join(map(str, sorted(missing)))}.')
+            members = [name for _, name, is_member in players if is_member]
+            if len(members) == 1 and len(player_ids) == 1:
+                raise ValidationError('Player is already part of this tournament.')
+            if members:
+                raise ValidationError(f'Already part of this tournament: {", ".join(members)}.')
+
+            self.players.add(*player_ids)
+        return [name for _, name, _ in players]
+
+    def remove_player(self, player):
+        with transaction.atomic():
+            self.lock_roster()
+            if not self.players.filter(id=player.id).exists():
+                raise ValidationError('Player is not part of this tournament.')
+            if self.games.filter(models.Q(player1=player) | models.Q(player2=player)).played().exists():
+                raise ValidationError('Cannot remove player who has already played games in this tournament.')
+            self.players.remove(player)
 
     def get_total_expected_games(self):
-        n = self.players.count()
+        # Read the maintained counter rather than counting the roster, which grows with large tournaments.
+        n = Tournament.objects.filter(pk=self.pk).values_list('players_count', flat=True).get()
         return (n * (n - 1)) // 2
 
     def get_played_games_count(self):
-        return self.games.filter(winner__isnull=False).count() + self.games.filter(is_draw=True).count()
+        return self.games.played().count()
 
     def update_status(self):
-        players_count = self.players.count()
-        
-        if players_count < 2:
-            self.status = 'planning'
-        else:
-            played_games = self.get_played_games_count()
-            total_expected_games = self.get_total_expected_games()
-            
-            if played_games == 0:
-                self.status = 'planning'
-            elif played_games >= total_expected_games:
-                self.status = 'finished'
-            else:
-                self.status = 'started'
-        
-        self.save()
+        Tournament.objects.filter(pk=self.pk).refresh_status()
+        self.refresh_from_db(
+            using=router.db_for_write(Tournament, instance=self),
+            fields=['status', 'players_count', 'played_games_count', 'version', 'updated_at'],
+        )
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='tournament_created_at_id'),
+        ]
+
+
+class GameQuerySet(models.QuerySet):
+    def played(self):
+        return self.filter(models.Q(winner__isnull=False) | models.Q(is_draw=True))
+
+    def pending(self):
+        return self.filter(winner__isnull=True, is_draw=False)
 
 
 class Game(models.Model):
@@ -68,8 +258,11 @@ class Game(models.Model):
     player2 = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='games_as_player2')
     winner = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='won_games', null=True, blank=True)
     is_draw = models.BooleanField(default=False)
+    round = models.PositiveSmallIntegerField(null=True, blank=True, editable=False)
     played_at = models.DateTimeField(auto_now_add=True)
 
+    objects = GameQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.tournament.name}: {self.player1.name} vs {self.player2.name}"
 
@@ -88,27 +281,214 @@ class Game(models.Model):
         
         if self.winner and self.winner not in [self.player1, self.player2]:
             raise ValidationError('Winner must be one of the players in the game.')
-        
-        existing_game_1 = Game.objects.filter(
-            tournament=self.tournament,
-            player1=self.player1,
-            player2=self.player2
-        ).exclude(id=self.id if self.id else 0)
-        
-        existing_game_2 = Game.objects.filter(
-            tournament=self.tournament,
-            player1=self.player2,
-            player2=self.player1
-        ).exclude(id=self.id if self.id else 0)
-        
-        if existing_game_1.exists() or existing_game_2.exists():
-            raise ValidationError('These players have already played against each other in this tournament.')
+
+    @property
+    def is_played(self):
+        return bool(self.winner_id) or self.is_draw
+
+    @property
+    def elo_score(self):
+        if self.is_draw:
+            return 0.5
+        return 1.0 if self.winner_id == self.player1_id else 0.0
+
+    def get_standing_deltas(self):
+        if self.is_draw:
+            delta = {'draws': 1, 'points': 1, 'games_played': 1}
+            return {self.player1_id: delta, self.player2_id: delta}
+
+        if self.winner_id:
+            loser_id = self.player2_id if self.winner_id == self.player1_id else self.player1_id
+            return {
+                self.winner_id: {'wins': 1, 'points': 2, 'games_played': 1},
+                loser_id: {'losses': 1, 'games_played': 1},
+            }
+
+        return {}
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
-        self.tournament.update_status()
+        try:
+            with transaction.atomic():
+                previous = None
+                if self.pk:
+                    previous = Game.objects.select_for_update().filter(pk=self.pk).first()
+                    if previous is not None and not previous.is_played and self.is_played:
+                        self.played_at = timezone.now()
+
+                super().save(*args, **kwargs)
+
+                played_games = Counter()
+                if previous is not None:
+                    Standing.objects.apply_game(previous, sign=-1)
+                    played_games[previous.tournament_id] -= previous.is_played
+                Standing.objects.apply_game(self)
+                played_games[self.tournament_id] += self.is_played
+
+                for tournament_id, delta in played_games.items():
+                    Tournament.objects.filter(pk=tournament_id).record_games(delta)
+
+                # Ratings are path dependent, so only first results are applied incrementally;
+                # corrections are picked up by the next recompute_ratings replay.
+                if previous is None or not previous.is_played:
+                    Player.objects.rate_games([self])
+        except IntegrityError:
+            # A concurrent writer recorded the same pairing between full_clean() and the insert.
+            if self.is_duplicate_pairing():
+                raise ValidationError(DUPLICATE_PAIRING_MESSAGE)
+            raise
+
+    def record_result(self, winner_id=None, is_draw=False):
+        if winner_id and is_draw:
+            raise ValidationError('A game cannot have both a winner and be a draw.')
+        if not winner_id and not is_draw:
+            raise ValidationError('A result needs either a winner or a draw.')
+        if winner_id and winner_id not in (self.player1_id, self.player2_id):
+            raise ValidationError('Winner must be one of the players in the game.')
+
+        played_at = timezone.now()
+        with transaction.atomic():
+            # The pending filter makes the update a compare-and-set, so two submissions cannot both score the game.
+            updated = Game.objects.filter(pk=self.pk).pending().update(
+                winner_id=winner_id, is_draw=is_draw, played_at=played_at
+            )
+            if not updated:
+                raise ValidationError('This game already has a result.')
+
+            self.winner_id, self.is_draw, self.played_at = winner_id, is_draw, played_at
+            Standing.objects.apply_game(self)
+            Tournament.objects.filter(pk=self.tournament_id).record_games(1)
+            Player.objects.rate_games([self])
+
+    def is_duplicate_pairing(self):
+        return Game.objects.filter(
+            tournament_id=self.tournament_id,
+            player1_id__in=[self.player1_id, self.player2_id],
+            player2_id__in=[self.player1_id, self.player2_id],
+        ).exclude(pk=self.pk).exists()
 
     class Meta:
         ordering = ['-played_at']
-        unique_together = []
+        constraints = [
+            models.UniqueConstraint(
+                'tournament',
+                Least('player1', 'player2'),
+                Greatest('player1', 'player2'),
+                name='unique_game_pairing',
+                violation_error_message=DUPLICATE_PAIRING_MESSAGE,
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['tournament', 'winner'], name='game_tournament_winner'),
+            models.Index(fields=['tournament', 'is_draw'], name='game_tournament_is_draw'),
+            models.Index(fields=['-played_at', '-id'], name='game_played_at_id'),
+            models.Index(fields=['tournament', '-played_at', '-id'], name='game_tournament_played_at_id'),
+            models.Index(fields=['tournament', 'round'], name='game_tournament_round'),
+        ]
+
+
+class StandingManager(models.Manager):
+    def apply_deltas(self, tournament_id, deltas, sign=1):
+        rolled_up = {}
+        for player_id, delta in deltas.items():
+            if self.filter(tournament_id=tournament_id, player_id=player_id).update(
+                **{field: models.F(field) + sign * value for field, value in delta.items()}
+            ):
+                rolled_up[player_id] = delta
+        PlayerStats.objects.apply_deltas(rolled_up, sign=sign)
+        if deltas:
+            standings_changed.send(sender=Standing, tournament_id=tournament_id, player_ids=set(deltas))
+
+    def apply_game(self, game, sign=1):
+        self.apply_deltas(game.tournament_id, game.get_standing_deltas(), sign=sign)
+
+
+class Standing(models.Model):
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name='standings')
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='standings')
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    games_played = models.IntegerField(default=0)
+
+    objects = StandingManager()
+
+    def __str__(self):
+        return f"{self.tournament_id}: {self.player_id} ({self.points} pts)"
+
+    class Meta:
+        ordering = ['tournament', '-points']
+        unique_together = [['tournament', 'player']]
+        indexes = [
+            models.Index(fields=['tournament', '-points'], name='standing_tournament_points'),
+        ]
+
+
+def win_rate(wins, games_played):
+    return models.Case(
+        models.When(
+            GreaterThan(games_played, 0),
+            then=Cast(wins, models.FloatField()) / Cast(games_played, models.FloatField()),
+        ),
+        default=models.Value(0.0),
+        output_field=models.FloatField(),
+    )
+
+
+class PlayerStatsManager(models.Manager):
+    def apply_deltas(self, deltas, sign=1):
+        for player_id, delta in deltas.items():
+            changes = {field: models.F(field) + sign * value for field, value in delta.items()}
+            # SET expressions read the old row, so the win rate is computed from the new counts explicitly.
+            changes['win_rate'] = win_rate(
+                changes.get('wins', models.F('wins')), changes.get('games_played', models.F('games_played'))
+            )
+            self.filter(player_id=player_id).update(**changes)
+
+    def enter_tournaments(self, player_ids, count=1):
+        return self.filter(player_id__in=player_ids).update(tournaments_entered=models.F('tournaments_entered') + count)
+
+    def remove_standings(self, standings):
+        # Career stats are the sum of a player's standings, so standings that go away are subtracted first,
+        # in one UPDATE however many players are affected.
+        totals = standings.filter(player_id=models.OuterRef('player_id')).order_by().values('player_id')
+
+        def total(aggregate):
+            return Coalesce(models.Subquery(totals.annotate(total=aggregate).values('total')), 0)
+
+        changes = {
+            field: models.F(field) - total(models.Sum(field))
+            for field in ('wins', 'draws', 'losses', 'points', 'games_played')
+        }
+        changes['tournaments_entered'] = models.F('tournaments_entered') - total(models.Count('pk'))
+        changes['win_rate'] = win_rate(changes['wins'], changes['games_played'])
+        return self.filter(player_id__in=standings.values('player_id')).update(**changes)
+
+
+class PlayerStats(models.Model):
+    SORTABLE_FIELDS = ['points', 'wins', 'win_rate', 'games_played', 'tournaments_entered']
+
+    player = models.OneToOneField(Player, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    tournaments_entered = models.IntegerField(default=0)
+    games_played = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    draws = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    points = models.IntegerField(default=0)
+    win_rate = models.FloatField(default=0.0)
+
+    objects = PlayerStatsManager()
+
+    def __str__(self):
+        return f"{self.player_id}: {self.points} pts in {self.tournaments_entered} tournaments"
+
+    class Meta:
+        verbose_name_plural = 'player stats'
+        indexes = [
+            models.Index(fields=['points', 'player'], name='player_stats_points'),
+            models.Index(fields=['wins', 'player'], name='player_stats_wins'),
+            models.Index(fields=['win_rate', 'player'], name='player_stats_win_rate'),
+            models.Index(fields=['games_played', 'player'], name='player_stats_games_played'),
+            models.Index(fields=['tournaments_entered', 'player'], name='player_stats_tournaments'),
+        ]
@@ -0,0 +1,120 @@
+import base64
+import binascii
+import json
+from types import SimpleNamespace
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in view.keyset_ordering]
+
+        position, reverse = self.decode_cursor(request)
+        ordering = [
+            ('-' if descending != reverse else '') + name
+            for name, descending in self.fields
+        ]
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position, reverse))
+
+        page = list(queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+
+        self.page = page
+        self.has_next = position is not None if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        return page
+
+    def get_position_filter(self, position, reverse):
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending), value in zip(self.fields, position):
+            lookup = 'lt' if descending != reverse else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            values = cursor['p']
+            if len(values) != len(self.fields):
+                raise ValueError
+            position = [
+                self.model._meta.get_field(name).to_python(value)
+                for (name, descending), value in zip(self.fields, values)
+            ]
+            return position, bool(cursor.get('r'))
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse):
+        if isinstance(instance, dict):
+            instance = SimpleNamespace(**instance)
+        values = [
+            self.model._meta.get_field(name).value_to_string(instance)
+            for name, descending in self.fields
+        ]
+        cursor = json.dumps({'p': values, 'r': reverse} if reverse else {'p': values}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(cursor.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class HybridPagination(PageNumberPagination):
+    keyset_query_param = 'pagination'
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if getattr(view, 'keyset_ordering', None) and self.wants_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def wants_keyset(self, request):
+        return (
+            request.query_params.get(self.keyset_query_param) == 'cursor'
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,77 @@
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils import timezone
+from .models import Player, Game
+
+
+def compute_levels(player1, player2, players_count):
+    # A game's level is one more than the latest level either player has reached, so every player
+    # appears at most once per level and each level can be applied in one vectorized step while
+    # still replaying every player's games in their original order.
+    last_level = [-1] * players_count
+    levels = np.empty(len(player1), dtype=np.int64)
+    for index, (a, b) in enumerate(zip(player1.tolist(), player2.tolist())):
+        level = max(last_level[a], last_level[b]) + 1
+        last_level[a] = last_level[b] = level
+        levels[index] = level
+    return levels
+
+
+def replay(player1, player2, scores, players_count, k_factor, initial_rating):
+    ratings = np.full(players_count, initial_rating, dtype=np.float64)
+    if not len(scores):
+        return ratings
+
+    levels = compute_levels(player1, player2, players_count)
+    order = np.argsort(levels, kind='stable')
+    boundaries = np.flatnonzero(np.diff(levels[order])) + 1
+
+    for games in np.split(order, boundaries):
+        a = player1[games]
+        b = player2[games]
+        expected = 1 / (1 + 10 ** ((ratings[b] - ratings[a]) / 400))
+        delta = k_factor * (scores[games] - expected)
+        ratings[a] += delta
+        ratings[b] -= delta
+
+    return ratings
+
+
+def load_history():
+    rows = Game.objects.filter(Q(winner__isnull=False) | Q(is_draw=True)).annotate(
+        score=Case(
+            When(is_draw=True, then=Value(0.5)),
+            When(winner=F('player1'), then=Value(1.0)),
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    ).order_by('played_at', 'id').values_list('player1_id', 'player2_id', 'score')
+
+    history = np.array(list(rows.iterator(chunk_size=10000)), dtype=np.float64).reshape(-1, 3)
+    player_ids, indexes = np.unique(history[:, :2].astype(np.int64), return_inverse=True)
+    indexes = indexes.reshape(-1, 2)
+    return player_ids, indexes[:, 0], indexes[:, 1], history[:, 2]
+
+
+def recompute_ratings(k_factor=None, batch_size=1000):
+    k_factor = settings.ELO_K_FACTOR if k_factor is None else k_factor
+    initial_rating = settings.ELO_INITIAL_RATING
+
+    with transaction.atomic():
+        player_ids, player1, player2, scores = load_history()
+        ratings = replay(player1, player2, scores, len(player_ids), k_factor, initial_rating)
+
+        updated_at = timezone.now()
+        Player.objects.exclude(id__in=player_ids.tolist()).update(rating=initial_rating, updated_at=updated_at)
+        Player.objects.bulk_update(
+            [
+                Player(id=player_id, rating=rating, updated_at=updated_at)
+                for player_id, rating in zip(player_ids.tolist(), ratings.tolist())
+            ],
+            ['rating', 'updated_at'],
+            batch_size=batch_size
+        )
+
+    return len(scores), len(player_ids)
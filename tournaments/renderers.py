@@ -0,0 +1,24 @@
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Renders with orjson when it is installed, producing the same bytes as JSONRenderer. Indented output and
+# anything orjson cannot encode fall back to the stdlib encoder.
+class FastJSONRenderer(JSONRenderer):
+    options = 0 if orjson is None else orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self.encoder_class().default, option=self.options)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # The stdlib renderer escapes the two line terminators that are not valid inside JavaScript strings.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
@@ -0,0 +1,80 @@
+import contextvars
+import random
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+read_alias = contextvars.ContextVar('read_alias', default=None)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = read_alias.set(self.choose_database(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        return self.finish(request, response)
+
+    async def __acall__(self, request):
+        token = read_alias.set(self.choose_database(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_alias.reset(token)
+        return self.finish(request, response)
+
+    def finish(self, request, response):
+        if request.method not in SAFE_METHODS and settings.DATABASE_REPLICAS:
+            window = settings.DATABASE_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                settings.DATABASE_REPLICA_STICKY_COOKIE, str(time.time() + window), max_age=window, httponly=True
+            )
+        return response
+
+    def choose_database(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return None
+        if request.method not in SAFE_METHODS or self.is_sticky(request):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def is_sticky(self, request):
+        # A client that has just written reads its own writes from the primary until the replicas catch up.
+        try:
+            return float(request.COOKIES[settings.DATABASE_REPLICA_STICKY_COOKIE]) > time.time()
+        except (KeyError, ValueError):
+            return False
@@ -0,0 +1,66 @@
+from django.db import transaction
+from django.db.models import Max
+from .models import Tournament, Game
+
+
+def circle_rounds(player_ids):
+    players = list(player_ids)
+    if len(players) % 2:
+        players.append(None)
+
+    rounds = []
+    for round_index in range(len(players) - 1):
+        pairs = []
+        for position in range(len(players) // 2):
+            home, away = players[position], players[-1 - position]
+            if home is None or away is None:
+                continue
+            if position == 0 and round_index % 2:
+                home, away = away, home
+            pairs.append((home, away))
+        rounds.append(pairs)
+        # Keep the first player fixed and rotate everyone else one seat clockwise.
+        players.insert(1, players.pop())
+    return rounds
+
+
+def schedule_round_robin(tournament_id, batch_size=1000):
+    with transaction.atomic():
+        Tournament.objects.select_for_update().filter(pk=tournament_id).values_list('pk').get()
+        roster = sorted(
+            Tournament.players.through.objects.filter(tournament_id=tournament_id).values_list('player_id', flat=True)
+        )
+        games = Game.objects.filter(tournament_id=tournament_id)
+        scheduled = {
+            frozenset(pairing) for pairing in games.order_by().values_list('player1_id', 'player2_id')
+        }
+        # New fixtures after a roster change are appended after the rounds that already exist.
+        offset = games.aggregate(last_round=Max('round'))['last_round'] or 0
+
+        fixtures = []
+        for pairs in circle_rounds(roster):
+            round_fixtures = [
+                Game(tournament_id=tournament_id, player1_id=player1_id, player2_id=player2_id)
+                for player1_id, player2_id in pairs
+                if frozenset((player1_id, player2_id)) not in scheduled
+            ]
+            if round_fixtures:
+                offset += 1
+                for fixture in round_fixtures:
+                    fixture.round = offset
+                fixtures.extend(round_fixtures)
+
+        if fixtures:
+            Game.objects.bulk_create(fixtures, batch_size=batch_size)
+            Tournament.objects.filter(pk=tournament_id).bump_version()
+
+    return fixtures
+
+
+def get_next_round(tournament_id):
+    next_round = Game.objects.filter(tournament_id=tournament_id, round__isnull=False).pending().order_by(
+        'round'
+    ).values_list('round', flat=True).first()
+    if next_round is None:
+        return None, Game.objects.none()
+    return next_round, Game.objects.filter(tournament_id=tournament_id, round=next_round).pending()
@@ -1,12 +1,27 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
 from rest_framework import serializers
-from .models import Player, Tournament, Game
+from rest_framework.relations import MANY_RELATION_KWARGS
+from rest_framework.settings import api_settings
+from .models import DUPLICATE_PAIRING_MESSAGE, Player, PlayerStats, Tournament, Game
 
 
 class PlayerSerializer(serializers.ModelSerializer):
     class Meta:
         model = Player
-        fields = ['id', 'name', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'name', 'rating', 'created_at', 'updated_at']
+        read_only_fields = ['id', 'rating', 'created_at', 'updated_at']
+
+
+class PlayerStatsSerializer(serializers.ModelSerializer):
+    player_id = serializers.IntegerField(read_only=True)
+    player_name = serializers.CharField(source='player.name', read_only=True)
+
+    class Meta:
+        model = PlayerStats
+        fields = ['player_id', 'player_name', 'tournaments_entered', 'games_played', 'wins', 'draws', 'losses',
+                  'points', 'win_rate']
+        read_only_fields = fields
 
 
 class GameSerializer(serializers.ModelSerializer):
@@ -17,8 +32,8 @@ class GameSerializer(serializers.ModelSerializer):
     class Meta:
         model = Game
         fields = ['id', 'tournament', 'player1', 'player2', 'player1_name', 'player2_name', 
-                  'winner', 'winner_name', 'is_draw', 'played_at']
-        read_only_fields = ['id', 'played_at']
+                  'winner', 'winner_name', 'is_draw', 'round', 'played_at']
+        read_only_fields = ['id', 'round', 'played_at']
 
     def validate(self, data):
         if data.get('player1') == data.get('player2'):
@@ -43,46 +58,141 @@ class GameSerializer(serializers.ModelSerializer):
         if winner and winner not in [player1, player2]:
             raise serializers.ValidationError('Winner must be one of the players in the game.')
         
-        if tournament and player1 and player2:
-            existing_game_1 = Game.objects.filter(
-                tournament=tournament,
-                player1=player1,
-                player2=player2
-            )
-            
-            existing_game_2 = Game.objects.filter(
-                tournament=tournament,
-                player1=player2,
-                player2=player1
-            )
-            
-            if self.instance:
-                existing_game_1 = existing_game_1.exclude(id=self.instance.id)
-                existing_game_2 = existing_game_2.exclude(id=self.instance.id)
-            
-            if existing_game_1.exists() or existing_game_2.exists():
-                raise serializers.ValidationError(
-                    'These players have already played against each other in this tournament.'
-                )
-        
         return data
 
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except DjangoValidationError as e:
+            winner, is_draw = validated_data.get('winner'), validated_data.get('is_draw', False)
+            fixture = None
+            if DUPLICATE_PAIRING_MESSAGE in e.messages and (winner or is_draw):
+                fixture = self.get_pending_fixture(validated_data)
+            if fixture is None:
+                raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: e.messages})
+
+        # The pairing was scheduled in advance, so posting its result scores the existing fixture.
+        try:
+            fixture.record_result(winner.id if winner else None, is_draw)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: e.messages})
+        return fixture
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: e.messages})
+
+    def get_pending_fixture(self, validated_data):
+        player_ids = [validated_data['player1'].id, validated_data['player2'].id]
+        return Game.objects.pending().select_related('player1', 'player2').filter(
+            tournament=validated_data['tournament'], player1_id__in=player_ids, player2_id__in=player_ids
+        ).first()
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    # Looks up every submitted pk in one query instead of one query per related object.
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        pks = []
+        for pk in data:
+            if isinstance(pk, bool):
+                self.child_relation.fail('incorrect_type', data_type=type(pk).__name__)
+            try:
+                pks.append(int(pk))
+            except (TypeError, ValueError):
+                self.child_relation.fail('incorrect_type', data_type=type(pk).__name__)
+
+        found = self.child_relation.get_queryset().in_bulk(pks)
+        for pk in pks:
+            if pk not in found:
+                self.child_relation.fail('does_not_exist', pk_value=pk)
+        return [found[pk] for pk in dict.fromkeys(pks)]
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+class RecordResultSerializer(serializers.Serializer):
+    winner = serializers.IntegerField(required=False, allow_null=True)
+    is_draw = serializers.BooleanField(default=False)
+
 
 class TournamentSerializer(serializers.ModelSerializer):
+    serializer_related_field = BulkPrimaryKeyRelatedField
     players_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Tournament
-        fields = ['id', 'name', 'status', 'players', 'players_count', 'created_at', 'updated_at']
+        fields = ['id', 'name', 'status', 'max_players', 'players', 'players_count', 'created_at', 'updated_at']
         read_only_fields = ['id', 'status', 'created_at', 'updated_at']
 
     def get_players_count(self, obj):
-        return obj.players.count()
+        return obj.players_count
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            instance = super().create(validated_data)
+        instance.refresh_from_db(fields=['status', 'players_count', 'version', 'updated_at'])
+        return instance
+
+    def update(self, instance, validated_data):
+        players = validated_data.pop('players', None)
+        max_players = validated_data.get('max_players')
+        with transaction.atomic():
+            # Roster replacements and cap changes are checked under the same row lock as add_players,
+            # so a concurrent add cannot push the roster past the cap between validation and the write.
+            if (players is not None or max_players is not None) and not instance.lock_roster(
+                roster_size=len(players) if players is not None else None, max_players=max_players
+            ):
+                cap, players_count = Tournament.objects.filter(pk=instance.pk).values_list(
+                    'max_players', 'players_count'
+                ).get()
+                if players is not None:
+                    raise serializers.ValidationError(
+                        {'players': [f'A tournament can have a maximum of {max_players or cap} participants.']}
+                    )
+                raise serializers.ValidationError(
+                    {'max_players': [f'This tournament already has {players_count} participants.']}
+                )
+            instance = super().update(instance, validated_data)
+            if players is not None:
+                instance.players.set(players)
+        instance.refresh_from_db(fields=['status', 'players_count', 'version', 'updated_at'])
+        return instance
 
-    def validate_players(self, value):
-        if len(value) > 5:
-            raise serializers.ValidationError('A tournament can have a maximum of 5 participants.')
-        return value
+    def validate(self, data):
+        default_max_players = self.instance.max_players if self.instance else Tournament.DEFAULT_MAX_PLAYERS
+        max_players = data.get('max_players', default_max_players)
+        players = data.get('players')
+        if players is not None and len(players) > max_players:
+            raise serializers.ValidationError(
+                {'players': [f'A tournament can have a maximum of {max_players} participants.']}
+            )
+        if players is None and self.instance is not None and self.instance.players_count > max_players:
+            raise serializers.ValidationError(
+                {'max_players': [f'This tournament already has {self.instance.players_count} participants.']}
+            )
+        return data
+
+
+class RosterTournamentSerializer(TournamentSerializer):
+    players = serializers.SerializerMethodField()
+
+    def get_players(self, obj):
+        return self.context['players']
 
 
 class AddPlayerToTournamentSerializer(serializers.Serializer):
@@ -94,6 +204,10 @@ class AddPlayerToTournamentSerializer(serializers.Serializer):
         return value
 
 
+class AddPlayersToTournamentSerializer(serializers.Serializer):
+    player_ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+
 class LeaderboardEntrySerializer(serializers.Serializer):
     player_id = serializers.IntegerField()
     player_name = serializers.CharField()
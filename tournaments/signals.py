@@ -0,0 +1,115 @@
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+from .live import publish_on_commit
+from .models import Player, PlayerStats, Tournament, Game, Standing, standings_changed
+
+
+def publish_roster_change(instance, reverse, pk_set, kind):
+    if reverse:
+        for tournament_id in pk_set:
+            publish_on_commit(tournament_id, **{kind: [instance.pk]})
+    else:
+        publish_on_commit(instance.pk, **{kind: pk_set})
+
+
+def drop_pending_fixtures(instance, reverse, pk_set):
+    if reverse:
+        fixtures = Game.objects.filter(Q(player1=instance) | Q(player2=instance))
+        if pk_set is not None:
+            fixtures = fixtures.filter(tournament_id__in=pk_set)
+    else:
+        fixtures = Game.objects.filter(tournament=instance)
+        if pk_set is not None:
+            fixtures = fixtures.filter(Q(player1_id__in=pk_set) | Q(player2_id__in=pk_set))
+    fixtures.pending().delete()
+
+
+@receiver(m2m_changed, sender=Tournament.players.through)
+def sync_roster_standings(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and not pk_set:
+        return
+
+    if reverse:
+        standings = Standing.objects.filter(player=instance)
+        tournaments = Tournament.objects.filter(pk__in=pk_set) if pk_set is not None else instance.tournaments.all()
+    else:
+        standings = Standing.objects.filter(tournament=instance)
+        tournaments = Tournament.objects.filter(pk=instance.pk)
+
+    if action == 'pre_clear':
+        field = 'tournament_id' if reverse else 'player_id'
+        publish_roster_change(instance, reverse, set(standings.values_list(field, flat=True)), 'removed_ids')
+        PlayerStats.objects.remove_standings(standings)
+        standings.delete()
+        drop_pending_fixtures(instance, reverse, None)
+        if reverse:
+            # The roster rows are still present here, so this is the last point at which we know what is affected.
+            tournaments.record_players(-1)
+    elif action == 'post_clear':
+        if not reverse:
+            tournaments.sync_players_count()
+    elif action == 'post_add':
+        if reverse:
+            pairs = [(tournament_id, instance.pk) for tournament_id in pk_set]
+        else:
+            pairs = [(instance.pk, player_id) for player_id in pk_set]
+        Standing.objects.bulk_create(
+            [Standing(tournament_id=tournament_id, player_id=player_id) for tournament_id, player_id in pairs],
+            ignore_conflicts=True
+        )
+        tournaments.record_players(1 if reverse else len(pk_set))
+        if reverse:
+            PlayerStats.objects.enter_tournaments([instance.pk], len(pk_set))
+        else:
+            PlayerStats.objects.enter_tournaments(pk_set)
+        publish_roster_change(instance, reverse, pk_set, 'player_ids')
+    elif action == 'post_remove':
+        lookup = 'tournament_id__in' if reverse else 'player_id__in'
+        standings = standings.filter(**{lookup: pk_set})
+        PlayerStats.objects.remove_standings(standings)
+        standings.delete()
+        drop_pending_fixtures(instance, reverse, pk_set)
+        tournaments.sync_players_count()
+        publish_roster_change(instance, reverse, pk_set, 'removed_ids')
+
+
+@receiver(pre_delete, sender=Tournament)
+def remove_tournament_standings(sender, instance, **kwargs):
+    # Taking the standings out before the cascade means the cascaded games no longer find rows to revert,
+    # so every player's career stats lose exactly what this tournament contributed.
+    standings = Standing.objects.filter(tournament=instance)
+    PlayerStats.objects.remove_standings(standings)
+    standings.delete()
+
+
+@receiver(pre_delete, sender=Player)
+def remove_player_standings(sender, instance, **kwargs):
+    # Deleting a player cascades the roster rows without m2m_changed, so the roster is handled here instead.
+    instance._roster_tournament_ids = list(instance.tournaments.values_list('pk', flat=True))
+    standings = Standing.objects.filter(player=instance)
+    PlayerStats.objects.remove_standings(standings)
+    standings.delete()
+
+
+@receiver(post_delete, sender=Player)
+def sync_player_tournaments(sender, instance, **kwargs):
+    tournament_ids = getattr(instance, '_roster_tournament_ids', [])
+    if tournament_ids:
+        # This also bumps each tournament's version, so cached leaderboards and ETags move on.
+        Tournament.objects.filter(pk__in=tournament_ids).sync_players_count()
+        publish_roster_change(instance, True, tournament_ids, 'removed_ids')
+
+
+@receiver(post_delete, sender=Game)
+def revert_game_standings(sender, instance, **kwargs):
+    if instance.is_played:
+        Standing.objects.apply_game(instance, sign=-1)
+        Tournament.objects.filter(pk=instance.tournament_id).record_games(-1)
+    else:
+        Tournament.objects.filter(pk=instance.tournament_id).bump_version()
+
+
+@receiver(standings_changed, sender=Standing)
+def publish_standings(sender, tournament_id, player_ids, **kwargs):
+    publish_on_commit(tournament_id, player_ids=player_ids)
@@ -0,0 +1,170 @@
+import time
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+from .models import Player, PlayerStats, Tournament, Game, Standing, status_case
+
+
+STANDING_FIELDS = ['wins', 'draws', 'losses', 'points', 'games_played']
+
+TOURNAMENT_STATE_FIELDS = ['players_count', 'played_games_count', 'status']
+
+PLAYER_STATS_FIELDS = ['tournaments_entered', *STANDING_FIELDS, 'win_rate']
+
+
+def compute_standings(tournament_ids=None):
+    roster = Tournament.players.through.objects.all()
+    games = Game.objects.filter(Q(winner__isnull=False) | Q(is_draw=True))
+    if tournament_ids is not None:
+        roster = roster.filter(tournament_id__in=tournament_ids)
+        games = games.filter(tournament_id__in=tournament_ids)
+
+    standings = {
+        (tournament_id, player_id): Standing(tournament_id=tournament_id, player_id=player_id)
+        for tournament_id, player_id in roster.values_list('tournament_id', 'player_id').iterator()
+    }
+
+    for side in ('player1', 'player2'):
+        rows = games.order_by().values('tournament_id', f'{side}_id').annotate(
+            wins=Count('pk', filter=Q(winner=F(side))),
+            draws=Count('pk', filter=Q(is_draw=True)),
+            games_played=Count('pk'),
+        )
+        for row in rows.iterator():
+            standing = standings.get((row['tournament_id'], row[f'{side}_id']))
+            if standing is None:
+                continue
+            standing.wins += row['wins']
+            standing.draws += row['draws']
+            standing.games_played += row['games_played']
+
+    for standing in standings.values():
+        standing.losses = standing.games_played - standing.wins - standing.draws
+        standing.points = standing.wins * 2 + standing.draws
+
+    return standings
+
+
+def find_drift(expected, tournament_ids=None):
+    existing = Standing.objects.all()
+    if tournament_ids is not None:
+        existing = existing.filter(tournament_id__in=tournament_ids)
+
+    # Returns the (tournament_id, player_id) keys of rows that are wrong, missing or should not exist.
+    drifted = set()
+    seen = set()
+    for row in existing.values('tournament_id', 'player_id', *STANDING_FIELDS).iterator():
+        key = (row['tournament_id'], row['player_id'])
+        seen.add(key)
+        standing = expected.get(key)
+        if standing is None or any(getattr(standing, field) != row[field] for field in STANDING_FIELDS):
+            drifted.add(key)
+
+    return drifted | (expected.keys() - seen)
+
+
+def rebuild_standings(tournament_ids=None, dry_run=False, batch_size=1000):
+    with transaction.atomic():
+        expected = compute_standings(tournament_ids)
+        drifted = find_drift(expected, tournament_ids)
+
+        if drifted and not dry_run:
+            existing = Standing.objects.all()
+            if tournament_ids is not None:
+                existing = existing.filter(tournament_id__in=tournament_ids)
+            existing.delete()
+            Standing.objects.bulk_create(expected.values(), batch_size=batch_size)
+            # Cached leaderboards, matrices and ETags of the repaired tournaments still reflect the old rows.
+            Tournament.objects.filter(pk__in={tournament_id for tournament_id, player_id in drifted}).bump_version()
+
+    return len(expected), len(drifted)
+
+
+def compute_player_stats():
+    stats = {
+        player_id: PlayerStats(player_id=player_id)
+        for player_id in Player.objects.order_by().values_list('id', flat=True).iterator()
+    }
+
+    rows = Standing.objects.order_by().values('player_id').annotate(
+        tournaments_entered=Count('pk'),
+        **{field: Sum(field) for field in STANDING_FIELDS},
+    )
+    for row in rows.iterator():
+        player_stats = stats[row.pop('player_id')]
+        for field, value in row.items():
+            setattr(player_stats, field, value)
+        if player_stats.games_played:
+            player_stats.win_rate = player_stats.wins / player_stats.games_played
+
+    return stats
+
+
+def rebuild_player_stats(dry_run=False, batch_size=1000):
+    # Career stats are rolled up from the standings table, so rebuild_standings first if that has drifted.
+    with transaction.atomic():
+        expected = compute_player_stats()
+
+        drifted = 0
+        seen = set()
+        for row in PlayerStats.objects.values('player_id', *PLAYER_STATS_FIELDS).iterator():
+            seen.add(row['player_id'])
+            player_stats = expected.get(row['player_id'])
+            if player_stats is None or any(getattr(player_stats, field) != row[field] for field in PLAYER_STATS_FIELDS):
+                drifted += 1
+        drifted += len(expected.keys() - seen)
+
+        if drifted and not dry_run:
+            PlayerStats.objects.all().delete()
+            PlayerStats.objects.bulk_create(expected.values(), batch_size=batch_size)
+
+    return len(expected), drifted
+
+
+def expected_tournament_state():
+    # Counters and status recomputed from the roster and the played games, as SQL expressions over each tournament.
+    def total(queryset):
+        counts = queryset.filter(tournament_id=OuterRef('pk')).order_by().values('tournament_id')
+        return Coalesce(Subquery(counts.annotate(total=Count('pk')).values('total')), 0)
+
+    players_count = total(Tournament.players.through.objects.all())
+    played_games_count = total(Game.objects.played())
+    return {
+        'players_count': players_count,
+        'played_games_count': played_games_count,
+        'status': status_case(players_count, played_games_count),
+    }
+
+
+def reconcile_tournaments(dry_run=False, chunk_size=5000):
+    # Yields (scanned, drifted rows, scan seconds, update seconds) for each chunk of tournaments in pk order.
+    # Each chunk is one annotated read and at most one UPDATE, however many tournaments have drifted.
+    expected = expected_tournament_state()
+    annotations = {f'expected_{field}': value for field, value in expected.items()}
+    last_pk = 0
+    while True:
+        started = time.perf_counter()
+        rows = list(
+            Tournament.objects.filter(pk__gt=last_pk).order_by('pk').annotate(**annotations).values(
+                'pk', 'name', *TOURNAMENT_STATE_FIELDS, *annotations
+            )[:chunk_size]
+        )
+        scanned = time.perf_counter() - started
+        if not rows:
+            return
+        last_pk = rows[-1]['pk']
+
+        drifted = [
+            row for row in rows
+            if any(row[field] != row[f'expected_{field}'] for field in TOURNAMENT_STATE_FIELDS)
+        ]
+        started = time.perf_counter()
+        if drifted and not dry_run:
+            # Recomputed inside the UPDATE, so games recorded since the read above are not overwritten.
+            Tournament.objects.filter(pk__in=[row['pk'] for row in drifted]).update(
+                **expected, version=F('version') + 1, updated_at=Now()
+            )
+        yield len(rows), drifted, scanned, time.perf_counter() - started
+
+        if len(rows) < chunk_size:
+            return
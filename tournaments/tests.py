@@ -1,7 +1,41 @@
-from django.test import TestCase
+import asyncio
+import csv
+import importlib
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from asgiref.sync import sync_to_async
+from django.apps import apps as django_apps
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connections, transaction
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.state import ProjectState
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
-from rest_framework import status
-from .models import Player, Tournament, Game
+from rest_framework import serializers as drf_serializers, status
+from .cache import stats as cache_stats, tournament_cache_key
+from .ingest import PlayerImport
+from .live import RESYNC, InMemoryBroker
+from .metrics import request_metrics
+from .models import Player, PlayerStats, Tournament, Game, Standing
+from .pagination import KeysetPagination
+from .scheduling import circle_rounds, schedule_round_robin
+from .serializers import TournamentSerializer
+
+
+def clear_tournament_caches():
+    caches['tournaments'].clear()
+    caches['tournaments-finished'].clear()
+    cache_stats.reset()
 
 
 class PlayerModelTest(TestCase):
@@ -62,6 +96,7 @@ class GameModelTest(TestCase):
 
 class TournamentAPITest(APITestCase):
     def setUp(self):
+        clear_tournament_caches()
         self.player1 = Player.objects.create(name="Alice")
         self.player2 = Player.objects.create(name="Bob")
         self.player3 = Player.objects.create(name="Charlie")
@@ -97,3 +132,1492 @@ class TournamentAPITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIn('leaderboard', response.data)
         self.assertEqual(response.data['status'], 'started')
+
+
+class LeaderboardEngineTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.dave = Player.objects.create(name="Dave")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob, self.charlie, self.dave)
+
+    def test_leaderboard_standings(self):
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.charlie, is_draw=True)
+        Game.objects.create(tournament=self.tournament, player1=self.dave, player2=self.bob, winner=self.dave)
+
+        response = self.client.get(f'/api/tournaments/{self.tournament.id}/leaderboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_players'], 4)
+        self.assertEqual(response.data['total_games_played'], 3)
+        self.assertEqual(response.data['total_expected_games'], 6)
+        self.assertEqual(
+            [dict(entry) for entry in response.data['leaderboard']],
+            [
+                {'player_id': self.bob.id, 'player_name': 'Bob', 'points': 2,
+                 'wins': 1, 'draws': 0, 'losses': 1, 'games_played': 2},
+                {'player_id': self.dave.id, 'player_name': 'Dave', 'points': 2,
+                 'wins': 1, 'draws': 0, 'losses': 0, 'games_played': 1},
+                {'player_id': self.alice.id, 'player_name': 'Alice', 'points': 1,
+                 'wins': 0, 'draws': 1, 'losses': 1, 'games_played': 2},
+                {'player_id': self.charlie.id, 'player_name': 'Charlie', 'points': 1,
+                 'wins': 0, 'draws': 1, 'losses': 0, 'games_played': 1},
+            ]
+        )
+
+    def test_leaderboard_query_count_is_constant(self):
+        url = f'/api/tournaments/{self.tournament.id}/leaderboard/'
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.alice)
+        self.tournament.players.add(Player.objects.create(name="Eve"))
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+    def test_leaderboard_unknown_tournament(self):
+        response = self.client.get('/api/tournaments/999/leaderboard/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class StandingTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob, self.charlie)
+
+    def standing(self, player):
+        return Standing.objects.values('wins', 'draws', 'losses', 'points', 'games_played').get(
+            tournament=self.tournament, player=player
+        )
+
+    def test_roster_changes_create_and_remove_standings(self):
+        self.assertEqual(Standing.objects.filter(tournament=self.tournament).count(), 3)
+
+        response = self.client.delete(
+            f'/api/tournaments/{self.tournament.id}/remove_player/', {'player_id': self.charlie.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Standing.objects.filter(tournament=self.tournament, player=self.charlie).exists())
+
+    def test_game_writes_apply_deltas(self):
+        game = Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.alice)
+        self.assertEqual(self.standing(self.alice), {'wins': 1, 'draws': 0, 'losses': 0, 'points': 2, 'games_played': 1})
+        self.assertEqual(self.standing(self.bob), {'wins': 0, 'draws': 0, 'losses': 1, 'points': 0, 'games_played': 1})
+
+        game.winner = None
+        game.is_draw = True
+        game.save()
+        self.assertEqual(self.standing(self.alice), {'wins': 0, 'draws': 1, 'losses': 0, 'points': 1, 'games_played': 1})
+        self.assertEqual(self.standing(self.bob), {'wins': 0, 'draws': 1, 'losses': 0, 'points': 1, 'games_played': 1})
+
+        response = self.client.delete(f'/api/games/{game.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.standing(self.alice), {'wins': 0, 'draws': 0, 'losses': 0, 'points': 0, 'games_played': 0})
+
+    def test_rebuild_command_repairs_drift(self):
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        Standing.objects.filter(player=self.bob).update(wins=5, points=10)
+        Standing.objects.filter(player=self.charlie).delete()
+
+        url = f'/api/tournaments/{self.tournament.id}/leaderboard/'
+        cached = self.client.get(url)
+        self.assertEqual(cached.data['leaderboard'][0]['wins'], 5)
+
+        out = StringIO()
+        call_command('rebuild_standings', '--dry-run', stdout=out)
+        self.assertIn('2 of 3 standings rows have drifted', out.getvalue())
+        self.assertEqual(self.standing(self.bob)['wins'], 5)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=cached['ETag']).status_code, 304)
+
+        call_command('rebuild_standings', stdout=StringIO())
+        self.assertEqual(self.standing(self.bob), {'wins': 1, 'draws': 0, 'losses': 0, 'points': 2, 'games_played': 1})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=cached['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['leaderboard'][0]['wins'], 1)
+        self.assertEqual(self.standing(self.charlie)['games_played'], 0)
+
+
+class LeaderboardCacheTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob)
+        self.url = f'/api/tournaments/{self.tournament.id}/leaderboard/'
+
+    def test_repeated_reads_hit_the_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['total_players'], 2)
+
+        stats = self.client.get('/api/cache/stats/').data['leaderboard']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_writes_invalidate_the_cache(self):
+        self.client.get(self.url)
+
+        game = Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        self.assertEqual(self.client.get(self.url).data['leaderboard'][0]['player_name'], 'Bob')
+        self.assertEqual(self.client.get(self.url).data['status'], 'finished')
+
+        self.client.post(f'/api/tournaments/{self.tournament.id}/add_player/', {'player_id': self.charlie.id}, format='json')
+        self.assertEqual(self.client.get(self.url).data['total_players'], 3)
+
+        self.client.delete(f'/api/games/{game.id}/')
+        self.assertEqual(self.client.get(self.url).data['total_games_played'], 0)
+
+        self.client.patch(f'/api/tournaments/{self.tournament.id}/', {'name': 'Renamed'}, format='json')
+        self.assertEqual(self.client.get(self.url).data['tournament_name'], 'Renamed')
+
+    def test_finished_tournaments_use_the_unbounded_cache(self):
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, is_draw=True)
+        self.client.get(self.url)
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.status, 'finished')
+        key = f'leaderboard:{self.tournament.pk}:{self.tournament.version}'
+        self.assertIsNotNone(caches['tournaments-finished'].get(key))
+        self.assertIsNone(caches['tournaments'].get(key))
+
+    def test_deleting_a_player_invalidates_the_cache(self):
+        self.tournament.players.add(self.charlie)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['total_players'], 3)
+
+        self.charlie.delete()
+        fresh = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(fresh.status_code, status.HTTP_200_OK)
+        self.assertEqual(fresh.data['total_players'], 2)
+        self.assertNotIn('Charlie', [entry['player_name'] for entry in fresh.data['leaderboard']])
+
+
+class GameBulkCreateTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.outsider = Player.objects.create(name="Outsider")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob, self.charlie)
+        self.url = '/api/games/bulk/'
+
+    def game(self, player1, player2, **result):
+        return dict({'tournament': self.tournament.id, 'player1': player1.id, 'player2': player2.id}, **result)
+
+    def test_bulk_create_all_valid(self):
+        games = [
+            self.game(self.alice, self.bob, winner=self.alice.id),
+            self.game(self.alice, self.charlie, is_draw=True),
+            self.game(self.charlie, self.bob, winner=self.bob.id),
+        ]
+        with self.assertNumQueries(16):
+            response = self.client.post(self.url, {'games': games}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data['created']), 3)
+        self.assertEqual(response.data['errors'], [])
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.status, 'finished')
+        standing = Standing.objects.get(tournament=self.tournament, player=self.alice)
+        self.assertEqual((standing.wins, standing.draws, standing.points), (1, 1, 3))
+
+    def test_partial_mode_reports_item_errors(self):
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        games = [
+            self.game(self.bob, self.alice, winner=self.alice.id),
+            self.game(self.alice, self.outsider, is_draw=True),
+            self.game(self.alice, self.charlie, winner=self.alice.id),
+            self.game(self.charlie, self.alice, is_draw=True),
+            {'tournament': self.tournament.id, 'player1': 'x'},
+        ]
+        response = self.client.post(self.url, {'games': games}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(len(response.data['created']), 1)
+        errors = {error['index']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(sorted(errors), [0, 1, 3, 4])
+        self.assertEqual(
+            errors[0]['non_field_errors'],
+            ['These players have already played against each other in this tournament.']
+        )
+        self.assertEqual(errors[1]['non_field_errors'], ['Outsider is not part of this tournament.'])
+        self.assertIn('player1', errors[4])
+        self.assertEqual(Game.objects.filter(tournament=self.tournament).count(), 2)
+
+    def test_atomic_mode_rejects_the_whole_batch(self):
+        games = [
+            self.game(self.alice, self.bob, winner=self.alice.id),
+            self.game(self.alice, self.alice, is_draw=True),
+        ]
+        response = self.client.post(self.url, {'games': games, 'atomic': True}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertFalse(Game.objects.exists())
+
+
+class GamePairingConstraintTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob)
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.alice)
+
+    def test_reversed_pairing_is_rejected_with_the_same_message(self):
+        response = self.client.post('/api/games/', {
+            'tournament': self.tournament.id,
+            'player1': self.bob.id,
+            'player2': self.alice.id,
+            'is_draw': True,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['non_field_errors'],
+            ['These players have already played against each other in this tournament.']
+        )
+
+    def test_database_rejects_duplicate_pairings(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Game.objects.bulk_create([
+                Game(tournament=self.tournament, player1=self.bob, player2=self.alice, is_draw=True)
+            ])
+
+    def test_updating_a_game_keeps_its_own_pairing(self):
+        game = Game.objects.get()
+        response = self.client.put(f'/api/games/{game.id}/', {
+            'tournament': self.tournament.id,
+            'player1': self.alice.id,
+            'player2': self.bob.id,
+            'winner': self.bob.id,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['winner_name'], 'Bob')
+
+
+class TournamentCounterTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+
+    def counters(self):
+        self.tournament.refresh_from_db()
+        return self.tournament.players_count, self.tournament.played_games_count, self.tournament.status
+
+    def test_roster_changes_update_players_count(self):
+        self.tournament.players.add(self.alice, self.bob)
+        self.charlie.tournaments.add(self.tournament)
+        self.assertEqual(self.counters(), (3, 0, 'planning'))
+
+        self.tournament.players.remove(self.charlie, self.charlie)
+        self.assertEqual(self.counters(), (2, 0, 'planning'))
+
+        self.alice.tournaments.clear()
+        self.assertEqual(self.counters(), (1, 0, 'planning'))
+
+        self.tournament.players.clear()
+        self.assertEqual(self.counters(), (0, 0, 'planning'))
+
+    def test_game_writes_update_played_games_count_and_status(self):
+        self.tournament.players.add(self.alice, self.bob, self.charlie)
+        game = Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        self.assertEqual(self.counters(), (3, 1, 'started'))
+
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.charlie, is_draw=True)
+        Game.objects.create(tournament=self.tournament, player1=self.bob, player2=self.charlie, is_draw=True)
+        self.assertEqual(self.counters(), (3, 3, 'finished'))
+
+        game.delete()
+        self.assertEqual(self.counters(), (3, 2, 'started'))
+
+    def test_deleting_a_player_updates_their_tournaments(self):
+        self.tournament.players.add(self.alice, self.bob, self.charlie)
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.alice)
+
+        response = self.client.delete(f'/api/players/{self.charlie.id}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.counters(), (2, 1, 'finished'))
+        self.assertFalse(Standing.objects.filter(player_id=self.charlie.id).exists())
+
+        self.tournament.max_players = 3
+        self.tournament.save()
+        self.tournament.add_players([Player.objects.create(name="Dave").id])
+        self.assertEqual(self.counters(), (3, 1, 'started'))
+
+    def test_saving_a_stale_instance_keeps_the_counters(self):
+        stale = Tournament.objects.get(pk=self.tournament.pk)
+        self.tournament.players.add(self.alice, self.bob)
+
+        stale.name = 'Renamed'
+        stale.save()
+        self.assertEqual(self.counters(), (2, 0, 'planning'))
+        self.assertEqual(self.tournament.name, 'Renamed')
+
+        stale = Tournament.objects.get(pk=self.tournament.pk)
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, is_draw=True)
+        self.assertEqual(self.counters(), (2, 1, 'finished'))
+        self.tournament.players.add(self.charlie)
+        self.assertEqual(self.counters(), (3, 1, 'started'))
+
+        stale.max_players = 6
+        stale.save()
+        self.assertEqual(self.counters(), (3, 1, 'started'))
+        self.assertEqual((stale.players_count, stale.status), (3, 'started'))
+
+    def test_save_reloads_the_version(self):
+        version = self.tournament.version
+        self.tournament.name = 'Renamed'
+        self.tournament.save()
+        self.assertEqual(self.tournament.version, version + 1)
+        self.assertEqual(tournament_cache_key('leaderboard', self.tournament), f'leaderboard:{self.tournament.pk}:{version + 1}')
+
+        self.tournament.save(update_fields=['name'])
+        self.assertEqual(Tournament.objects.get(pk=self.tournament.pk).version, self.tournament.version)
+        self.assertEqual(self.tournament.version, version + 2)
+
+    def test_list_reads_players_count_from_the_column(self):
+        self.tournament.players.add(self.alice, self.bob)
+        Tournament.objects.create(name="Other Tournament").players.add(self.charlie)
+
+        response = self.client.get('/api/tournaments/')
+        counts = {row['name']: row['players_count'] for row in response.data['results']}
+        self.assertEqual(counts, {'Test Tournament': 2, 'Other Tournament': 1})
+
+        response = self.client.post('/api/tournaments/', {
+            'name': 'Created', 'players': [self.alice.id, self.bob.id, self.charlie.id]
+        }, format='json')
+        self.assertEqual(response.data['players_count'], 3)
+
+
+class QueryBudgetTest(APITestCase):
+    SIZES = [1, 5, 20]
+
+    def setUp(self):
+        clear_tournament_caches()
+
+    def seed(self, size):
+        players = Player.objects.bulk_create([Player(name=f"Player {size}-{i}") for i in range(5)])
+        tournaments = []
+        for i in range(size):
+            tournament = Tournament.objects.create(name=f"Tournament {size}-{i}")
+            tournament.players.add(*players)
+            Game.objects.create(tournament=tournament, player1=players[0], player2=players[1], winner=players[0])
+            Game.objects.create(tournament=tournament, player1=players[2], player2=players[3], is_draw=True)
+            tournaments.append(tournament)
+        return players, tournaments
+
+    def assertQueryBudget(self, budget, url):
+        with self.assertNumQueries(budget):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_endpoints(self):
+        for size in self.SIZES:
+            with self.subTest(size=size):
+                players, tournaments = self.seed(size)
+                self.assertQueryBudget(2, '/api/players/')
+                self.assertQueryBudget(3, '/api/tournaments/')
+                self.assertQueryBudget(2, '/api/games/')
+                self.assertQueryBudget(2, f'/api/games/?tournament={tournaments[0].id}')
+
+    def test_detail_endpoints(self):
+        for size in self.SIZES:
+            with self.subTest(size=size):
+                players, tournaments = self.seed(size)
+                game = Game.objects.filter(tournament=tournaments[-1]).first()
+                self.assertQueryBudget(1, f'/api/players/{players[0].id}/')
+                self.assertQueryBudget(2, f'/api/tournaments/{tournaments[-1].id}/')
+                self.assertQueryBudget(1, f'/api/games/{game.id}/')
+                self.assertQueryBudget(2, f'/api/tournaments/{tournaments[-1].id}/leaderboard/')
+
+
+@mock.patch.object(KeysetPagination, 'page_size', 3)
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        players = Player.objects.bulk_create([Player(name=f"Player {i}") for i in range(5)])
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(*players)
+        for i, player1 in enumerate(players):
+            for player2 in players[i + 1:]:
+                Game.objects.create(tournament=self.tournament, player1=player1, player2=player2, is_draw=True)
+        # Force ties on played_at so the id tiebreaker decides the order.
+        played_at = Game.objects.order_by('played_at').first().played_at
+        Game.objects.filter(id__in=Game.objects.order_by('id').values('id')[:6]).update(played_at=played_at)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(row['id'] for row in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_cursor_pages_cover_every_game_once_in_order(self):
+        expected = list(Game.objects.order_by('-played_at', '-id').values_list('id', flat=True))
+        self.assertEqual(self.walk('/api/games/?pagination=cursor'), expected)
+        self.assertEqual(self.walk(f'/api/games/?pagination=cursor&tournament={self.tournament.id}'), expected)
+
+        expected = list(Player.objects.order_by('name', 'id').values_list('id', flat=True))
+        self.assertEqual(self.walk('/api/players/?pagination=cursor'), expected)
+
+    def test_previous_link_returns_the_preceding_page(self):
+        first = self.client.get('/api/games/?pagination=cursor').data
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).data
+        previous = self.client.get(second['previous']).data
+        self.assertEqual(
+            [row['id'] for row in previous['results']],
+            [row['id'] for row in first['results']]
+        )
+
+    def test_page_fetch_is_a_single_query(self):
+        next_url = self.client.get('/api/games/?pagination=cursor').data['next']
+        with self.assertNumQueries(1):
+            self.client.get(next_url)
+
+    def test_page_number_pagination_is_still_the_default(self):
+        response = self.client.get('/api/games/')
+        self.assertEqual(response.data['count'], 10)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/games/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ExportTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob, self.charlie)
+        self.other = Tournament.objects.create(name="Other Tournament")
+        self.other.players.add(self.alice, self.bob)
+        self.game = Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.charlie, is_draw=True)
+        Game.objects.create(tournament=self.other, player1=self.alice, player2=self.bob, winner=self.alice)
+
+    def read(self, response):
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_games_ndjson_matches_the_api_representation(self):
+        body = self.read(self.client.get(f'/api/games/export/?tournament={self.tournament.id}'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 2)
+
+        expected = self.client.get(f'/api/games/{self.game.id}/').data
+        self.assertEqual(rows[-1], json.loads(json.dumps(expected)))
+
+    def test_games_csv_with_played_at_range(self):
+        Game.objects.filter(pk=self.game.pk).update(played_at=self.game.played_at - timedelta(days=2))
+        after = (self.game.played_at - timedelta(days=1)).isoformat()
+
+        response = self.client.get('/api/games/export/', {'format': 'csv', 'played_after': after})
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(StringIO(self.read(response))))
+        self.assertEqual(rows[0][:4], ['id', 'tournament', 'player1', 'player2'])
+        self.assertEqual(len(rows), 3)
+        self.assertNotIn(str(self.game.id), [row[0] for row in rows[1:]])
+
+    def test_standings_export(self):
+        body = self.read(self.client.get(f'/api/tournaments/export/?tournament={self.other.id}'))
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(
+            [(row['player_name'], row['points'], row['status']) for row in rows],
+            [('Alice', 2, 'finished'), ('Bob', 0, 'finished')]
+        )
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get('/api/games/export/?format=xml').status_code, 400)
+        self.assertEqual(self.client.get('/api/games/export/?played_after=yesterday').status_code, 400)
+        self.assertEqual(self.client.get('/api/tournaments/export/?tournament=abc').status_code, 400)
+
+
+class RatingTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob, self.charlie)
+
+    def ratings(self):
+        return dict(Player.objects.values_list('name', 'rating'))
+
+    @override_settings(ELO_INITIAL_RATING=1200.0)
+    def test_initial_rating_follows_the_setting_without_a_migration(self):
+        self.assertEqual(Player.objects.create(name="Dave").rating, 1200.0)
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        autodetector = MigrationAutodetector(loader.project_state(), ProjectState.from_apps(django_apps))
+        self.assertEqual(autodetector.changes(graph=loader.graph), {})
+
+    def test_new_results_update_ratings_incrementally(self):
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.alice)
+        self.assertEqual(self.ratings(), {'Alice': 1516.0, 'Bob': 1484.0, 'Charlie': 1500.0})
+
+        Game.objects.create(tournament=self.tournament, player1=self.bob, player2=self.charlie, is_draw=True)
+        ratings = self.ratings()
+        self.assertAlmostEqual(ratings['Bob'] + ratings['Charlie'], 2984.0)
+        self.assertGreater(ratings['Bob'], 1484.0)
+
+        response = self.client.get(f'/api/players/{self.alice.id}/')
+        self.assertEqual(response.data['rating'], 1516.0)
+
+    def test_rankings_are_ordered_by_rating(self):
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        response = self.client.get('/api/players/rankings/')
+        self.assertEqual([row['name'] for row in response.data['results']], ['Bob', 'Charlie', 'Alice'])
+
+    def test_batch_recompute_matches_incremental_replay(self):
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.alice)
+        Game.objects.create(tournament=self.tournament, player1=self.bob, player2=self.charlie, is_draw=True)
+        Game.objects.create(tournament=self.tournament, player1=self.charlie, player2=self.alice, winner=self.charlie)
+        incremental = self.ratings()
+
+        Player.objects.update(rating=1000)
+        call_command('recompute_ratings', stdout=StringIO())
+        for name, rating in self.ratings().items():
+            self.assertAlmostEqual(rating, incremental[name])
+
+        call_command('recompute_ratings', '--k-factor', '16', stdout=StringIO())
+        self.assertAlmostEqual(self.ratings()['Alice'] - 1500, (incremental['Alice'] - 1500) / 2, delta=0.5)
+
+    def test_bulk_ingest_rates_games_in_order(self):
+        self.client.post('/api/games/bulk/', {'games': [
+            {'tournament': self.tournament.id, 'player1': self.alice.id, 'player2': self.bob.id, 'winner': self.alice.id},
+            {'tournament': self.tournament.id, 'player1': self.alice.id, 'player2': self.charlie.id, 'is_draw': True},
+        ]}, format='json')
+        bulk = self.ratings()
+
+        call_command('recompute_ratings', stdout=StringIO())
+        for name, rating in self.ratings().items():
+            self.assertAlmostEqual(rating, bulk[name])
+
+
+class AsyncReadViewTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.charlie, self.alice, self.bob)
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.charlie, is_draw=True)
+
+    async def assertSameAsSync(self, sync_url, async_url, status_code=status.HTTP_200_OK):
+        expected = await sync_to_async(self.client.get)(sync_url)
+        response = await self.async_client.get(async_url)
+        self.assertEqual(response.status_code, status_code)
+        self.assertEqual(expected.status_code, status_code)
+        self.assertEqual(response.json(), expected.json())
+
+    async def test_async_views_match_sync_views(self):
+        pk = self.tournament.id
+        await self.assertSameAsSync(f'/api/tournaments/{pk}/', f'/api/async/tournaments/{pk}/')
+        await self.assertSameAsSync(f'/api/tournaments/{pk}/leaderboard/', f'/api/async/tournaments/{pk}/leaderboard/')
+        await self.assertSameAsSync(f'/api/games/?tournament={pk}', f'/api/async/games/?tournament={pk}')
+
+    async def test_async_views_not_found(self):
+        await self.assertSameAsSync('/api/tournaments/999/', '/api/async/tournaments/999/', status.HTTP_404_NOT_FOUND)
+        await self.assertSameAsSync(
+            '/api/tournaments/999/leaderboard/', '/api/async/tournaments/999/leaderboard/', status.HTTP_404_NOT_FOUND
+        )
+        await self.assertSameAsSync('/api/games/?page=5', '/api/async/games/?page=5', status.HTTP_404_NOT_FOUND)
+
+    async def test_async_game_list_pagination(self):
+        with mock.patch('tournaments.async_views.AsyncGameListView.page_size', 1):
+            response = await self.async_client.get('/api/async/games/?page=2')
+        data = response.json()
+        self.assertEqual(data['count'], 2)
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['previous'], 'http://testserver/api/async/games/')
+
+
+class LiveLeaderboardTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob)
+
+    def parse_event(self, chunk):
+        fields = dict(line.split(': ', 1) for line in chunk.decode().strip().split('\n') if ': ' in line)
+        return fields['event'], json.loads(fields['data'])
+
+    def record_game(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Game.objects.create(tournament=self.tournament, **kwargs)
+
+    def add_player(self, player):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/tournaments/{self.tournament.id}/add_player/', {'player_id': player.id})
+
+    async def test_stream_sends_snapshot_then_deltas(self):
+        response = await self.async_client.get(f'/api/tournaments/{self.tournament.id}/leaderboard/live/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+
+        event, data = self.parse_event(await anext(stream))
+        self.assertEqual(event, 'snapshot')
+        self.assertEqual(data['total_players'], 2)
+
+        await sync_to_async(self.record_game)(player1=self.alice, player2=self.bob, winner=self.alice)
+        event, data = self.parse_event(await asyncio.wait_for(anext(stream), 5))
+        self.assertEqual(event, 'delta')
+        self.assertEqual(data['total_games_played'], 1)
+        self.assertEqual(
+            {entry['player_name']: entry['points'] for entry in data['standings']}, {'Alice': 2, 'Bob': 0}
+        )
+
+        await sync_to_async(self.add_player)(self.charlie)
+        event, data = self.parse_event(await asyncio.wait_for(anext(stream), 5))
+        self.assertEqual(data['total_players'], 3)
+        self.assertEqual([entry['player_name'] for entry in data['standings']], ['Charlie'])
+        await response.streaming_content.aclose()
+
+    async def test_broker_fans_out_to_every_subscriber(self):
+        broker = InMemoryBroker(queue_size=2)
+        first, second = broker.subscribe(1), broker.subscribe(1)
+        other = broker.subscribe(2)
+
+        self.assertEqual(await sync_to_async(broker.publish)(1, (1, 'frame')), 2)
+        self.assertEqual(await asyncio.wait_for(first.get(), 1), (1, 'frame'))
+        self.assertEqual(await asyncio.wait_for(second.get(), 1), (1, 'frame'))
+        self.assertTrue(other.queue.empty())
+
+        for version in range(2, 5):
+            broker.publish(1, (version, 'frame'))
+        await asyncio.sleep(0)
+        self.assertIs(await first.get(), RESYNC)
+
+        for subscription in (first, second, other):
+            broker.unsubscribe(subscription)
+        self.assertFalse(broker.has_subscribers(1))
+
+    def test_no_work_without_subscribers(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, is_draw=True)
+        self.assertEqual(callbacks, [])
+
+
+class BenchmarkCommandTest(TransactionTestCase):
+    def setUp(self):
+        clear_tournament_caches()
+
+    def test_seed_bench_builds_consistent_round_robins(self):
+        call_command('seed_bench', players=12, tournaments=4, completion=0.5, seed=7, stdout=StringIO())
+
+        self.assertEqual(Player.objects.count(), 12)
+        for tournament in Tournament.objects.all():
+            self.assertEqual(tournament.players_count, 5)
+            self.assertEqual(tournament.played_games_count, 5)
+            self.assertEqual(tournament.games.count(), 5)
+            self.assertEqual(tournament.status, 'started')
+        out = StringIO()
+        call_command('rebuild_standings', dry_run=True, stdout=out)
+        self.assertIn('0 of 20', out.getvalue())
+
+    def test_bench_writes_json_results(self):
+        call_command('seed_bench', players=5, tournaments=2, seed=1, skip_ratings=True, stdout=StringIO())
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'bench.json')
+            call_command('bench', requests=2, concurrency=1, output=output, stdout=StringIO())
+            with open(output) as f:
+                results = json.load(f)
+
+        self.assertEqual(results['meta']['dataset'], {'players': 5, 'tournaments': 2, 'games': 20})
+        endpoints = results['endpoints']
+        self.assertIn('tournament-leaderboard', endpoints)
+        self.assertIn('async-game-list?tournament={tournament}', endpoints)
+        self.assertNotIn('game-bulk-create', endpoints)
+        self.assertEqual(endpoints['tournament-leaderboard']['queries'], 1)
+        self.assertTrue(all(result['status'] == 200 for result in endpoints.values()))
+
+    @override_settings(ALLOWED_HOSTS=['localhost', '127.0.0.1'])
+    def test_bench_uses_an_allowed_host_and_rejects_error_responses(self):
+        call_command('seed_bench', players=5, tournaments=1, seed=1, skip_ratings=True, stdout=StringIO())
+        out = StringIO()
+        call_command('bench', requests=2, concurrency=1, endpoint=['leaderboard', 'async-game-list'], stdout=out)
+        self.assertIn('async-game-list', out.getvalue())
+
+        with override_settings(ALLOWED_HOSTS=['example.com']), \
+                mock.patch('tournaments.benchmarks.benchmark_host', return_value='localhost'):
+            with self.assertRaisesMessage(CommandError, 'returned HTTP 400'):
+                call_command('bench', requests=2, concurrency=1, endpoint=['player-list'], stdout=StringIO())
+
+    @override_settings(ALLOWED_HOSTS=['localhost', '127.0.0.1'])
+    def test_bench_async_compares_successful_responses(self):
+        call_command('seed_bench', players=5, tournaments=1, seed=1, skip_ratings=True, stdout=StringIO())
+        out = StringIO()
+        call_command('bench_async', requests=2, concurrency=2, stdout=out)
+        self.assertEqual([line.split()[-5] for line in out.getvalue().splitlines()[1:]], ['sync', 'async'] * 3)
+
+        with mock.patch('tournaments.benchmarks.benchmark_host', return_value='example.com'):
+            with self.assertRaisesMessage(CommandError, 'returned HTTP 400'):
+                call_command('bench_async', requests=2, concurrency=2, stdout=StringIO())
+
+    def test_bench_render_compares_identical_output(self):
+        call_command('seed_bench', players=8, tournaments=3, seed=1, skip_ratings=True, stdout=StringIO())
+        out = StringIO()
+        call_command('bench_render', rows=5, iterations=2, stdout=out)
+
+        lines = out.getvalue().splitlines()[2:]
+        self.assertEqual([line.split()[0] for line in lines], ['players', 'tournaments', 'games', 'leaderboard'])
+        self.assertTrue(all(line.endswith('yes') for line in lines))
+
+    @override_settings(ALLOWED_HOSTS=['localhost', '127.0.0.1'])
+    def test_bench_scale_reports_flat_query_counts(self):
+        out = StringIO()
+        call_command('bench_scale', sizes='4,12', requests=2, stdout=out)
+
+        rows = [line.split() for line in out.getvalue().splitlines()[1:]]
+        self.assertEqual(len(rows), 8)
+        self.assertEqual([row[0] for row in rows], ['4'] * 4 + ['12'] * 4)
+        self.assertEqual([row[-1] for row in rows[:4]], [row[-1] for row in rows[4:]])
+
+
+@override_settings(METRICS_SAMPLE_RATE=1.0)
+class MetricsTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        request_metrics.reset()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob)
+
+    def test_server_timing_header_counts_queries(self):
+        response = self.client.get(f'/api/tournaments/{self.tournament.id}/leaderboard/')
+        self.assertRegex(response['Server-Timing'], r'^db;desc="2 queries";dur=[\d.]+, total;dur=[\d.]+$')
+
+    async def test_async_view_queries_are_recorded(self):
+        response = await self.async_client.get(f'/api/async/tournaments/{self.tournament.id}/')
+        self.assertIn('db;desc="2 queries"', response['Server-Timing'])
+
+    def test_metrics_endpoint_renders_prometheus_text(self):
+        self.client.get(f'/api/tournaments/{self.tournament.id}/leaderboard/')
+        self.client.get(f'/api/tournaments/{self.tournament.id}/leaderboard/')
+        self.client.get('/api/tournaments/999/')
+
+        response = self.client.get('/metrics')
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE tournaments_db_queries histogram', body)
+        self.assertIn(
+            'tournaments_http_requests_total{view="tournament-leaderboard",method="GET",status="200"} 2', body
+        )
+        self.assertIn('tournaments_http_requests_total{view="tournament-detail",method="GET",status="404"} 1', body)
+        self.assertIn('tournaments_db_queries_bucket{view="tournament-leaderboard",le="2"} 2', body)
+        self.assertIn('tournaments_db_queries_count{view="tournament-leaderboard"} 2', body)
+        self.assertIn('tournaments_cache_requests_total{cache="leaderboard",result="hits"} 1', body)
+
+    @override_settings(METRICS_SAMPLE_RATE=0.0, METRICS_SLOW_REQUEST_MS=0)
+    def test_unsampled_requests_are_counted_and_slow_ones_logged(self):
+        with self.assertLogs('tournaments.metrics', level='WARNING') as logs:
+            response = self.client.get('/api/players/')
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+$')
+        self.assertIn('Slow request GET /api/players/ (player-list)', logs.output[0])
+        body = request_metrics.render()
+        self.assertIn('tournaments_http_slow_requests_total{view="player-list"} 1', body)
+        self.assertNotIn('tournaments_db_queries_count{view="player-list"}', body)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], DATABASE_REPLICA_STICKY_SECONDS=5)
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.alice, self.bob)
+
+    def get_queries(self, method, path, data=None):
+        with CaptureQueriesContext(connections['default']) as primary:
+            with CaptureQueriesContext(connections['replica']) as replica:
+                response = getattr(self.client, method)(path, data, content_type='application/json')
+        return response, len(primary), len(replica)
+
+    def test_reads_use_replica_and_writes_use_primary(self):
+        response, primary, replica = self.get_queries('get', f'/api/tournaments/{self.tournament.id}/leaderboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((primary, replica > 0), (0, True))
+
+        response, primary, replica = self.get_queries('post', '/api/players/', {'name': 'Charlie'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual((primary > 0, replica), (True, 0))
+
+    def test_client_reads_from_primary_right_after_writing(self):
+        self.get_queries('post', '/api/games/', {
+            'tournament': self.tournament.id, 'player1': self.alice.id, 'player2': self.bob.id, 'winner': self.alice.id
+        })
+        response, primary, replica = self.get_queries('get', f'/api/tournaments/{self.tournament.id}/leaderboard/')
+        self.assertEqual(response.json()['total_games_played'], 1)
+        self.assertEqual((primary > 0, replica), (True, 0))
+
+        with mock.patch('tournaments.routers.time.time', return_value=time.time() + 6):
+            response, primary, replica = self.get_queries('get', f'/api/tournaments/{self.tournament.id}/')
+        self.assertEqual((primary, replica > 0), (0, True))
+
+    def test_exports_stream_from_the_replica(self):
+        response, primary, replica = self.get_queries('get', '/api/games/export/')
+        with CaptureQueriesContext(connections['replica']) as streamed:
+            b''.join(response.streaming_content)
+        self.assertEqual(len(streamed), 1)
+
+
+class TournamentMatrixTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(self.charlie, self.alice, self.bob)
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.bob)
+        Game.objects.create(tournament=self.tournament, player1=self.charlie, player2=self.alice, is_draw=True)
+        self.url = f'/api/tournaments/{self.tournament.id}/matrix/'
+
+    def test_matrix_and_remaining_pairings(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([player['name'] for player in data['players']], ['Alice', 'Bob', 'Charlie'])
+        self.assertEqual(data['results'], [
+            ['-', 'L', 'D'],
+            ['W', '-', None],
+            ['D', None, '-'],
+        ])
+        self.assertEqual(data['remaining_pairings'], [[self.bob.id, self.charlie.id]])
+
+    def test_matrix_is_cached_until_the_tournament_changes(self):
+        with self.assertNumQueries(3):
+            self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+        Game.objects.create(tournament=self.tournament, player1=self.bob, player2=self.charlie, winner=self.charlie)
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url).json()
+        self.assertEqual(data['results'][1][2], 'L')
+        self.assertEqual(data['remaining_pairings'], [])
+        self.assertEqual(data['status'], 'finished')
+
+    def test_matrix_not_found(self):
+        response = self.client.get('/api/tournaments/999/matrix/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RoundRobinScheduleTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.players = [Player.objects.create(name=name) for name in ['Alice', 'Bob', 'Charlie', 'Dave', 'Eve']]
+        self.alice, self.bob, self.charlie = self.players[:3]
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.tournament.players.add(*self.players)
+
+    def schedule(self):
+        return self.client.post(f'/api/tournaments/{self.tournament.id}/schedule/')
+
+    def fixture(self, player1, player2):
+        return Game.objects.get(
+            tournament=self.tournament, player1__in=[player1, player2], player2__in=[player1, player2]
+        )
+
+    def test_circle_method_pairs_everyone_once(self):
+        rounds = circle_rounds([1, 2, 3, 4, 5])
+        self.assertEqual(len(rounds), 5)
+        pairings = [frozenset(pair) for pairs in rounds for pair in pairs]
+        self.assertEqual(len(pairings), 10)
+        self.assertEqual(len(set(pairings)), 10)
+        for pairs in rounds:
+            players = [player for pair in pairs for player in pair]
+            self.assertEqual(len(players), len(set(players)))
+
+    def test_schedule_creates_pending_fixtures(self):
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.alice)
+
+        response = self.schedule()
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['created'], 9)
+        self.assertEqual(self.schedule().json(), {'created': 0, 'rounds': 0})
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.get_played_games_count(), 1)
+        self.assertEqual(self.tournament.played_games_count, 1)
+        self.assertEqual(self.tournament.status, 'started')
+        leaderboard = self.client.get(f'/api/tournaments/{self.tournament.id}/leaderboard/').json()
+        self.assertEqual(leaderboard['total_games_played'], 1)
+        self.assertEqual(sum(entry['games_played'] for entry in leaderboard['leaderboard']), 2)
+        matrix = self.client.get(f'/api/tournaments/{self.tournament.id}/matrix/').json()
+        self.assertEqual(len(matrix['remaining_pairings']), 9)
+
+    def test_next_round_advances_as_results_come_in(self):
+        self.schedule()
+        first_round = self.client.get(f'/api/tournaments/{self.tournament.id}/next_round/').json()
+        self.assertEqual(first_round['round'], 1)
+        self.assertEqual(len(first_round['games']), 2)
+
+        for game in first_round['games']:
+            response = self.client.post(f'/api/games/{game["id"]}/result/', {'winner': game['player1']})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()['winner'], game['player1'])
+
+        self.assertEqual(self.client.get(f'/api/tournaments/{self.tournament.id}/next_round/').json()['round'], 2)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.played_games_count, 2)
+
+        response = self.client.post(f'/api/games/{first_round["games"][0]["id"]}/result/', {'is_draw': True})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()['non_field_errors'], ['This game already has a result.'])
+
+    def test_recording_a_result_is_a_single_row_update(self):
+        self.schedule()
+        fixture = self.fixture(self.alice, self.bob)
+        with self.assertNumQueries(10):
+            fixture.record_result(is_draw=True)
+        self.assertEqual(Standing.objects.get(tournament=self.tournament, player=self.bob).points, 1)
+
+    def test_posting_a_scheduled_pairing_scores_the_fixture(self):
+        self.schedule()
+        fixture = self.fixture(self.alice, self.bob)
+        response = self.client.post('/api/games/', {
+            'tournament': self.tournament.id, 'player1': fixture.player2_id, 'player2': fixture.player1_id,
+            'winner': self.bob.id,
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['id'], fixture.id)
+        self.assertEqual(response.json()['winner_name'], 'Bob')
+
+        fixture = self.fixture(self.alice, self.charlie)
+        response = self.client.post('/api/games/bulk/', {'games': [
+            {'tournament': self.tournament.id, 'player1': self.alice.id, 'player2': self.charlie.id, 'is_draw': True},
+            {'tournament': self.tournament.id, 'player1': self.alice.id, 'player2': self.bob.id, 'is_draw': True},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.json()['created'], [fixture.id])
+        self.assertEqual(Game.objects.filter(tournament=self.tournament).count(), 10)
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.played_games_count, 2)
+
+    def test_removing_a_player_drops_their_pending_fixtures(self):
+        self.schedule()
+        response = self.client.delete(
+            f'/api/tournaments/{self.tournament.id}/remove_player/', {'player_id': self.alice.id}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Game.objects.filter(tournament=self.tournament).count(), 6)
+
+
+class RosterMutationTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.players = [Player.objects.create(name=f"Player {index}") for index in range(7)]
+        self.tournament = Tournament.objects.create(name="Test Tournament")
+        self.url = f'/api/tournaments/{self.tournament.id}/add_players/'
+
+    def test_add_players_in_one_transaction(self):
+        ids = [player.id for player in self.players[:3]]
+        response = self.client.post(self.url, {'player_ids': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['players'], ['Player 0', 'Player 1', 'Player 2'])
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.players_count, 3)
+        self.assertEqual(self.tournament.status, 'planning')
+        self.assertEqual(Standing.objects.filter(tournament=self.tournament).count(), 3)
+
+    def test_add_players_is_all_or_nothing(self):
+        self.tournament.players.add(self.players[0])
+        cases = [
+            ([player.id for player in self.players[1:6]], 'Adding 5 players would exceed the maximum of 5 participants.'),
+            ([self.players[0].id, self.players[1].id], 'Already part of this tournament: Player 0.'),
+            ([self.players[1].id, 999], 'Player does not exist: 999.'),
+        ]
+        for ids, message in cases:
+            response = self.client.post(self.url, {'player_ids': ids}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.json(), {'error': message})
+
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.players_count, 1)
+        self.assertEqual(list(self.tournament.players.all()), [self.players[0]])
+
+    def test_cap_is_checked_against_the_committed_roster(self):
+        stale = Tournament.objects.get(pk=self.tournament.pk)
+        self.tournament.add_players([player.id for player in self.players[:5]])
+
+        with self.assertRaisesMessage(ValidationError, 'Tournament already has the maximum of 5 participants.'):
+            stale.add_players([self.players[5].id])
+        self.assertEqual(self.tournament.players.count(), 5)
+
+    def test_single_add_query_budget(self):
+        self.tournament.players.add(*self.players[:3])
+        with self.assertNumQueries(11):
+            response = self.client.post(
+                f'/api/tournaments/{self.tournament.id}/add_player/', {'player_id': self.players[3].id}
+            )
+        self.assertEqual(response.json(), {'message': 'Player Player 3 added to tournament Test Tournament.'})
+
+
+class PlayerImportTest(APITestCase):
+    url = '/api/players/import/'
+
+    def setUp(self):
+        Player.objects.create(name="Alice")
+
+    def test_csv_import_skips_existing_and_duplicate_names(self):
+        body = '﻿name,club\nAlice,A\nBob,B\n  Charlie  ,C\nBob,B\n,D\n'.encode('utf-8')
+        with mock.patch('tournaments.views.PlayerImportView.chunk_size', 2):
+            response = self.client.post(self.url, body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.json()
+        self.assertEqual((data['created'], data['skipped'], data['invalid']), (2, 2, 1))
+        self.assertEqual(data['errors'], [{'line': 6, 'error': 'This field may not be blank.'}])
+        self.assertEqual(
+            list(Player.objects.filter(id__in=data['ids']).values_list('name', flat=True)), ['Bob', 'Charlie']
+        )
+
+    def test_ndjson_file_upload(self):
+        upload = SimpleUploadedFile('players.ndjson', b'{"name": "Bob"}\n\n{"name": "Alice"}\nnot json\n')
+        response = self.client.post(self.url, {'file': upload})
+
+        data = response.json()
+        self.assertEqual((data['created'], data['skipped'], data['invalid']), (1, 1, 1))
+        self.assertEqual(data['errors'], [{'line': 4, 'error': 'Invalid JSON.'}])
+        self.assertEqual(Player.objects.get(id=data['ids'][0]).rating, 1500)
+
+    def test_content_type_parameters_are_ignored(self):
+        response = self.client.post(self.url, b'name\nBob\n', content_type='text/csv; charset=utf-8')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(self.url, b'{"name": "Eve"}\n', content_type='Application/X-NDJSON; charset=UTF-8')
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(Player.objects.filter(name__in=['Bob', 'Eve']).count(), 2)
+
+    def test_rejects_unknown_format_and_missing_column(self):
+        response = self.client.post(self.url, b'name\nBob\n', content_type='text/plain')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, b'player\nBob\n', content_type='text/csv')
+        self.assertEqual(response.json()['error'], 'The CSV header must contain a "name" column.')
+        self.assertEqual(response.json()['created'], 0)
+        self.assertFalse(Player.objects.filter(name='Bob').exists())
+
+
+    def test_read_error_reports_committed_chunks(self):
+        body = 'name\nBob\nCharlie\nDave\nEve\n'.encode('utf-8') + b'\xff\n'
+        with mock.patch('tournaments.views.PlayerImportView.chunk_size', 2):
+            response = self.client.post(self.url, body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        data = response.json()
+        self.assertIn('utf-8', data['error'])
+        self.assertEqual(data['created'], 4)
+        self.assertEqual(
+            list(Player.objects.filter(id__in=data['ids']).values_list('name', flat=True)), ['Bob', 'Charlie', 'Dave', 'Eve']
+        )
+
+    def test_names_inserted_concurrently_are_not_reported_as_created(self):
+        player_import = PlayerImport(chunk_size=10)
+        lookup = Player.objects.filter
+
+        def concurrent_insert(*args, **kwargs):
+            # Another request commits "Bob" between this import's lookup and its insert.
+            result = list(lookup(*args, **kwargs).values_list('name', flat=True))
+            if not lookup(name='Bob').exists():
+                Player.objects.create(name='Bob')
+            return mock.Mock(values_list=mock.Mock(return_value=result))
+
+        with mock.patch.object(Player.objects, 'filter', side_effect=concurrent_insert):
+            player_import.insert({'Bob': 2, 'Charlie': 3})
+
+        bob = Player.objects.get(name='Bob')
+        self.assertEqual(player_import.created_ids, [Player.objects.get(name='Charlie').id])
+        self.assertNotIn(bob.id, player_import.created_ids)
+        self.assertTrue(PlayerStats.objects.filter(player__name='Charlie').exists())
+
+
+class LeanReadTest(APITestCase):
+    def setUp(self):
+        self.players = [Player.objects.create(name=name) for name in ('Zoë', 'Alice', 'Line\u2028Break', 'Bob')]
+        self.tournament = Tournament.objects.create(name='Lean Cup')
+        self.tournament.players.set(self.players)
+        Tournament.objects.create(name='Empty Cup')
+        Game.objects.create(
+            tournament=self.tournament, player1=self.players[0], player2=self.players[1], winner=self.players[1]
+        )
+        Game.objects.create(tournament=self.tournament, player1=self.players[2], player2=self.players[3], is_draw=True)
+        schedule_round_robin(self.tournament.id)
+
+    def fetch(self, url, lean):
+        clear_tournament_caches()
+        with override_settings(TOURNAMENT_LEAN_READS=lean):
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.content
+
+    def test_lean_reads_match_serializer_output_byte_for_byte(self):
+        for url in [
+            '/api/players/',
+            '/api/players/?pagination=cursor',
+            '/api/tournaments/',
+            '/api/tournaments/?pagination=cursor',
+            '/api/games/',
+            f'/api/games/?tournament={self.tournament.id}&pagination=cursor',
+            f'/api/tournaments/{self.tournament.id}/leaderboard/',
+        ]:
+            with self.subTest(url=url):
+                self.assertEqual(self.fetch(url, lean=True), self.fetch(url, lean=False))
+
+    def test_cursor_links_work_on_lean_pages(self):
+        with mock.patch.object(KeysetPagination, 'page_size', 3):
+            data = self.client.get('/api/players/?pagination=cursor').json()
+            names = [player['name'] for player in data['results']]
+            data = self.client.get(data['next']).json()
+        names += [player['name'] for player in data['results']]
+        self.assertEqual(names, sorted(player.name for player in self.players))
+
+    def test_renderer_falls_back_to_stdlib_encoder(self):
+        url = f'/api/games/?tournament={self.tournament.id}'
+        content = self.fetch(url, lean=True)
+        with mock.patch('tournaments.renderers.orjson', None):
+            self.assertEqual(self.fetch(url, lean=True), content)
+        self.assertIn(b'Line\\u2028Break', content)
+
+
+class ConditionalRequestTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.tournament = Tournament.objects.create(name="Cup")
+        self.tournament.players.set([self.alice, self.bob])
+        self.leaderboard_url = f'/api/tournaments/{self.tournament.id}/leaderboard/'
+
+    def get(self, url, **headers):
+        return self.client.get(url, HTTP_ACCEPT='application/json', **headers)
+
+    def test_unchanged_leaderboard_returns_304_without_building_it(self):
+        response = self.get(self.leaderboard_url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with mock.patch('tournaments.views.get_leaderboard') as get_leaderboard, self.assertNumQueries(1):
+            response = self.get(self.leaderboard_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        get_leaderboard.assert_not_called()
+
+        Game.objects.create(tournament=self.tournament, player1=self.alice, player2=self.bob, winner=self.alice)
+        response = self.get(self.leaderboard_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_if_modified_since_and_renderer_specific_etags(self):
+        url = f'/api/tournaments/{self.tournament.id}/'
+        response = self.get(url)
+        self.assertEqual(self.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+        self.assertNotEqual(self.client.get(url, HTTP_ACCEPT='text/html')['ETag'], response['ETag'])
+        self.assertEqual(self.get('/api/tournaments/999/', HTTP_IF_NONE_MATCH='*').status_code, 404)
+
+    def test_roster_fixture_and_player_changes_move_the_etags(self):
+        tournament_url = f'/api/tournaments/{self.tournament.id}/'
+        player_url = f'/api/players/{self.alice.id}/'
+        etags = [self.get(url)['ETag'] for url in (tournament_url, self.leaderboard_url, player_url)]
+
+        carol = Player.objects.create(name="Carol")
+        self.client.post(f'/api/tournaments/{self.tournament.id}/add_player/', {'player_id': carol.id})
+        self.assertNotEqual(self.get(tournament_url)['ETag'], etags[0])
+
+        etag = self.get(tournament_url)['ETag']
+        schedule_round_robin(self.tournament.id)
+        self.assertNotEqual(self.get(tournament_url)['ETag'], etag)
+        etag = self.get(tournament_url)['ETag']
+        Game.objects.filter(
+            tournament=self.tournament, player1__in=[self.bob, carol], player2__in=[self.bob, carol]
+        ).delete()
+        self.assertNotEqual(self.get(tournament_url)['ETag'], etag)
+
+        etag = self.get(self.leaderboard_url)['ETag']
+        self.client.patch(player_url, {'name': 'Alicia'})
+        response = self.get(self.leaderboard_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Alicia', [entry['player_name'] for entry in response.json()['leaderboard']])
+        self.assertNotEqual(self.get(player_url)['ETag'], etags[2])
+
+        etag = self.get(player_url)['ETag']
+        Game.objects.filter(
+            tournament=self.tournament, player1__in=[self.alice, carol], player2__in=[self.alice, carol]
+        ).get().record_result(carol.id)
+        self.assertEqual(self.get(player_url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_list_endpoints_use_weak_etags(self):
+        response = self.get('/api/players/')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(self.get('/api/players/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+        Player.objects.create(name="Carol")
+        self.assertEqual(self.get('/api/players/', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+class LeaderboardBatchTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        players = [Player.objects.create(name=f"Player {index}") for index in range(4)]
+        self.tournaments = []
+        for index in range(3):
+            tournament = Tournament.objects.create(name=f"Cup {index}")
+            tournament.players.set(players[index:index + 2])
+            self.tournaments.append(tournament)
+        Game.objects.create(
+            tournament=self.tournaments[0], player1=players[0], player2=players[1], winner=players[1]
+        )
+
+    def test_batch_matches_single_leaderboards_and_reuses_the_cache(self):
+        ids = [self.tournaments[2].id, self.tournaments[0].id, 999, self.tournaments[1].id]
+        url = f'/api/leaderboards/?ids={",".join(map(str, ids))}'
+        expected = [self.client.get(f'/api/tournaments/{pk}/leaderboard/').json() for pk in ids if pk != 999]
+
+        clear_tournament_caches()
+        self.client.get(f'/api/tournaments/{self.tournaments[0].id}/leaderboard/')
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.json(), {'count': 3, 'results': expected})
+        self.assertEqual(cache_stats.snapshot()['leaderboard']['hits'], 1)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).json()['results'], expected)
+
+    def test_status_filter(self):
+        data = self.client.get('/api/leaderboards/?status=finished').json()
+        self.assertEqual([leaderboard['tournament_id'] for leaderboard in data['results']], [self.tournaments[0].id])
+        self.assertEqual(data['results'][0]['leaderboard'][0]['points'], 2)
+
+    def test_rejects_bad_or_too_many_ids(self):
+        with mock.patch('tournaments.views.LeaderboardBatchView.max_tournaments', 2):
+            response = self.client.get('/api/leaderboards/?ids=1,2,3')
+        self.assertEqual(response.json(), {'error': 'At most 2 tournaments can be requested at once.'})
+        for query in ('', '?ids=1,x', '?status=done'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/leaderboards/{query}').status_code, 400)
+
+
+class PlayerStatsTest(APITestCase):
+    def setUp(self):
+        self.alice = Player.objects.create(name="Alice")
+        self.bob = Player.objects.create(name="Bob")
+        self.charlie = Player.objects.create(name="Charlie")
+        self.first = Tournament.objects.create(name="First")
+        self.first.players.set([self.alice, self.bob, self.charlie])
+        self.second = Tournament.objects.create(name="Second")
+        self.second.players.set([self.alice, self.bob])
+
+        Game.objects.create(tournament=self.first, player1=self.alice, player2=self.bob, winner=self.alice)
+        Game.objects.create(tournament=self.first, player1=self.alice, player2=self.charlie, is_draw=True)
+        Game.objects.create(tournament=self.second, player1=self.bob, player2=self.alice, winner=self.alice)
+
+    def stats(self, player):
+        return self.client.get(f'/api/players/{player.id}/stats/').json()
+
+    def test_stats_are_rolled_up_incrementally(self):
+        self.assertEqual(self.stats(self.alice), {
+            'player_id': self.alice.id,
+            'player_name': 'Alice',
+            'tournaments_entered': 2,
+            'games_played': 3,
+            'wins': 2,
+            'draws': 1,
+            'losses': 0,
+            'points': 5,
+            'win_rate': 2 / 3,
+        })
+        self.assertEqual(self.stats(self.bob)['losses'], 2)
+
+        game = Game.objects.get(tournament=self.second)
+        game.winner = self.bob
+        game.save()
+        self.assertEqual(self.stats(self.alice)['win_rate'], 1 / 3)
+        self.first.delete()
+        self.assertEqual(
+            [self.stats(self.alice)[field] for field in ('tournaments_entered', 'games_played', 'points')], [1, 1, 0]
+        )
+
+        self.second.players.clear()
+        self.assertEqual(self.stats(self.bob)['tournaments_entered'], 0)
+        self.assertEqual(self.stats(self.bob)['games_played'], 0)
+
+    def test_migration_backfills_existing_players(self):
+        expected = list(PlayerStats.objects.order_by('player_id').values())
+        PlayerStats.objects.all().delete()
+        self.assertEqual(self.client.get(f'/api/players/{self.alice.id}/stats/').status_code, 404)
+
+        migration = importlib.import_module('tournaments.migrations.0010_playerstats')
+        migration.populate_player_stats(django_apps, None)
+        self.assertEqual(list(PlayerStats.objects.order_by('player_id').values()), expected)
+
+    def test_rebuild_matches_incremental_updates(self):
+        out = StringIO()
+        call_command('rebuild_player_stats', dry_run=True, stdout=out)
+        self.assertIn('0 of 3', out.getvalue())
+
+        PlayerStats.objects.filter(player=self.alice).update(points=0)
+        PlayerStats.objects.filter(player=self.bob).delete()
+        call_command('rebuild_player_stats', stdout=out)
+        self.assertEqual(self.stats(self.alice)['points'], 5)
+        self.assertEqual(self.stats(self.bob)['tournaments_entered'], 2)
+
+    def test_sorted_list(self):
+        response = self.client.get('/api/players/stats/?ordering=-points')
+        self.assertEqual([row['player_name'] for row in response.json()['results']], ['Alice', 'Charlie', 'Bob'])
+        response = self.client.get('/api/players/stats/?ordering=win_rate&pagination=cursor')
+        self.assertEqual([row['player_name'] for row in response.json()['results']], ['Bob', 'Charlie', 'Alice'])
+        self.assertEqual(self.client.get('/api/players/stats/?ordering=name').status_code, 400)
+
+
+class LargeTournamentTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.players = Player.objects.bulk_create([Player(name=f"Player {index:03}") for index in range(60)])
+
+    def test_cap_is_configurable_per_tournament(self):
+        ids = [player.id for player in self.players[:8]]
+        response = self.client.post('/api/tournaments/', {'name': 'Open', 'max_players': 8, 'players': ids}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json()['players_count'], 8)
+
+        tournament = Tournament.objects.get(pk=response.json()['id'])
+        with self.assertRaisesMessage(ValidationError, 'Tournament already has the maximum of 8 participants.'):
+            tournament.add_players([self.players[8].id])
+
+        response = self.client.post('/api/tournaments/', {'name': 'Small', 'players': ids}, format='json')
+        self.assertEqual(response.json(), {'players': ['A tournament can have a maximum of 5 participants.']})
+
+    def test_cap_cannot_drop_below_the_roster(self):
+        tournament = Tournament.objects.create(name="Open", max_players=10)
+        tournament.add_players([player.id for player in self.players[:6]])
+        url = f'/api/tournaments/{tournament.id}/'
+
+        response = self.client.patch(url, {'max_players': 5}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json(), {'max_players': ['This tournament already has 6 participants.']})
+        self.assertEqual(self.client.patch(url, {'max_players': 1}, format='json').status_code, 400)
+        self.assertEqual(self.client.patch(url, {'max_players': 6}, format='json').json()['max_players'], 6)
+
+    def test_roster_and_cap_changes_are_rechecked_under_the_lock(self):
+        tournament = Tournament.objects.create(name="Open", max_players=5)
+        ids = [player.id for player in self.players[:5]]
+
+        serializer = TournamentSerializer(Tournament.objects.get(pk=tournament.pk), data={'max_players': 2}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        tournament.add_players(ids[:3])
+        with self.assertRaisesMessage(drf_serializers.ValidationError, 'This tournament already has 3 participants.'):
+            serializer.save()
+
+        serializer = TournamentSerializer(Tournament.objects.get(pk=tournament.pk), data={'players': ids[:4]}, partial=True)
+        self.assertTrue(serializer.is_valid())
+        Tournament.objects.filter(pk=tournament.pk).update(max_players=3)
+        with self.assertRaisesMessage(drf_serializers.ValidationError, 'A tournament can have a maximum of 3 participants.'):
+            serializer.save()
+
+        tournament.refresh_from_db()
+        self.assertEqual((tournament.players_count, tournament.max_players), (3, 3))
+        response = self.client.patch(f'/api/tournaments/{tournament.id}/', {'players': ids[2:5]}, format='json')
+        self.assertEqual(response.json()['players_count'], 3)
+        self.assertEqual(sorted(tournament.players.values_list('id', flat=True)), ids[2:5])
+
+    def test_validation_queries_do_not_grow_with_the_roster(self):
+        queries = []
+        for size in (4, 50):
+            tournament = Tournament.objects.create(name=f"Open {size}", max_players=60)
+            tournament.add_players([player.id for player in self.players[:size]])
+            schedule_round_robin(tournament.id)
+            game = tournament.games.pending().first()
+            newcomer = self.players[size]
+
+            with CaptureQueriesContext(connections['default']) as add:
+                response = self.client.post(f'/api/tournaments/{tournament.id}/add_player/', {'player_id': newcomer.id})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            with CaptureQueriesContext(connections['default']) as result:
+                response = self.client.post(f'/api/games/{game.id}/result/', {'winner': game.player1_id})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            with CaptureQueriesContext(connections['default']) as batch:
+                response = self.client.post('/api/games/bulk/', {'games': [{
+                    'tournament': tournament.id, 'player1': self.players[0].id, 'player2': newcomer.id, 'is_draw': True,
+                }]}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            queries.append([len(add), len(result), len(batch)])
+
+        self.assertEqual(queries[0], queries[1])
+
+
+class ReconcileTournamentsTest(APITestCase):
+    def setUp(self):
+        clear_tournament_caches()
+        self.players = Player.objects.bulk_create([Player(name=f"Player {index}") for index in range(3)])
+        self.tournaments = [Tournament.objects.create(name=f"Tournament {index}") for index in range(5)]
+        for tournament in self.tournaments[:3]:
+            tournament.players.add(*self.players)
+            Game.objects.create(tournament=tournament, player1=self.players[0], player2=self.players[1], is_draw=True)
+        Tournament.objects.filter(pk=self.tournaments[0].pk).update(status='finished')
+        Tournament.objects.filter(pk=self.tournaments[1].pk).update(played_games_count=0, status='planning')
+        Tournament.objects.filter(pk=self.tournaments[4].pk).update(players_count=2)
+
+    def state(self):
+        return list(Tournament.objects.order_by('pk').values_list('players_count', 'played_games_count', 'status'))
+
+    def test_dry_run_reports_the_diff(self):
+        before = self.state()
+        out = StringIO()
+        call_command('reconcile_tournaments', dry_run=True, chunk_size=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn(f'#{self.tournaments[0].pk} Tournament 0: status finished -> started', output)
+        self.assertIn(
+            f'#{self.tournaments[1].pk} Tournament 1: played_games_count 0 -> 1, status planning -> started', output
+        )
+        self.assertIn(f'#{self.tournaments[4].pk} Tournament 4: players_count 2 -> 0', output)
+        self.assertIn('3 of 5 tournaments have drifted.', output)
+        self.assertIn('3 chunks in', output)
+        self.assertEqual(self.state(), before)
+
+    def test_reconcile_fixes_counters_and_status_in_bulk(self):
+        versions = dict(Tournament.objects.values_list('pk', 'version'))
+        with CaptureQueriesContext(connections['default']) as captured:
+            call_command('reconcile_tournaments', chunk_size=2, stdout=StringIO())
+
+        updates = [query for query in captured if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(self.state(), [(3, 1, 'started')] * 3 + [(0, 0, 'planning')] * 2)
+        bumped = [pk for pk, version in Tournament.objects.order_by('pk').values_list('pk', 'version') if version != versions[pk]]
+        self.assertEqual(bumped, [self.tournaments[index].pk for index in (0, 1, 4)])
+
+        out = StringIO()
+        call_command('reconcile_tournaments', stdout=out)
+        self.assertIn('All 5 tournaments are up to date.', out.getvalue())
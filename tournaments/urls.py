@@ -1,26 +1,68 @@
 from django.urls import path
+from .async_views import (
+    AsyncTournamentDetailView,
+    AsyncTournamentLeaderboardView,
+    AsyncGameListView,
+    TournamentLiveLeaderboardView,
+)
 from .views import (
     PlayerListView,
+    PlayerRankingView,
+    PlayerImportView,
     PlayerDetailView,
+    PlayerStatsListView,
+    PlayerStatsView,
     TournamentListView,
     TournamentDetailView,
     TournamentAddPlayerView,
+    TournamentAddPlayersView,
     TournamentRemovePlayerView,
     TournamentLeaderboardView,
+    LeaderboardBatchView,
+    TournamentMatrixView,
+    TournamentScheduleView,
+    TournamentNextRoundView,
     GameListView,
+    GameBulkCreateView,
     GameDetailView,
+    GameResultView,
+    CacheStatsView,
+    GameExportView,
+    StandingExportView,
 )
 
 urlpatterns = [
     path('players/', PlayerListView.as_view(), name='player-list'),
+    path('players/import/', PlayerImportView.as_view(), name='player-import'),
+    path('players/rankings/', PlayerRankingView.as_view(), name='player-rankings'),
+    path('players/stats/', PlayerStatsListView.as_view(), name='player-stats-list'),
     path('players/<int:pk>/', PlayerDetailView.as_view(), name='player-detail'),
+    path('players/<int:pk>/stats/', PlayerStatsView.as_view(), name='player-stats'),
     
     path('tournaments/', TournamentListView.as_view(), name='tournament-list'),
+    path('tournaments/export/', StandingExportView.as_view(), name='tournament-export'),
     path('tournaments/<int:pk>/', TournamentDetailView.as_view(), name='tournament-detail'),
     path('tournaments/<int:pk>/add_player/', TournamentAddPlayerView.as_view(), name='tournament-add-player'),
+    path('tournaments/<int:pk>/add_players/', TournamentAddPlayersView.as_view(), name='tournament-add-players'),
     path('tournaments/<int:pk>/remove_player/', TournamentRemovePlayerView.as_view(), name='tournament-remove-player'),
     path('tournaments/<int:pk>/leaderboard/', TournamentLeaderboardView.as_view(), name='tournament-leaderboard'),
+    path('tournaments/<int:pk>/schedule/', TournamentScheduleView.as_view(), name='tournament-schedule'),
+    path('tournaments/<int:pk>/next_round/', TournamentNextRoundView.as_view(), name='tournament-next-round'),
+    path('tournaments/<int:pk>/matrix/', TournamentMatrixView.as_view(), name='tournament-matrix'),
+    path('tournaments/<int:pk>/leaderboard/live/', TournamentLiveLeaderboardView.as_view(),
+         name='tournament-leaderboard-live'),
+    path('leaderboards/', LeaderboardBatchView.as_view(), name='leaderboard-batch'),
     
     path('games/', GameListView.as_view(), name='game-list'),
+    path('games/export/', GameExportView.as_view(), name='game-export'),
+    path('games/bulk/', GameBulkCreateView.as_view(), name='game-bulk-create'),
     path('games/<int:pk>/', GameDetailView.as_view(), name='game-detail'),
+    path('games/<int:pk>/result/', GameResultView.as_view(), name='game-result'),
+
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+
+    path('async/tournaments/<int:pk>/', AsyncTournamentDetailView.as_view(), name='async-tournament-detail'),
+    path('async/tournaments/<int:pk>/leaderboard/', AsyncTournamentLeaderboardView.as_view(),
+         name='async-tournament-leaderboard'),
+    path('async/games/', AsyncGameListView.as_view(), name='async-game-list'),
 ]
@@ -1,36 +1,163 @@
+import csv
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError
+from django.db.models import Prefetch
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from .models import Player, Tournament, Game
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.views import View
+from .models import DUPLICATE_PAIRING_MESSAGE, Player, PlayerStats, Tournament, Game
+from .cache import stats as cache_stats
+from .conditional import ConditionalObjectMixin, WeakETagMixin, conditional, player_tag, tournament_tag
+from .export import (
+    EXPORT_FORMATS,
+    GAME_EXPORT_FIELDS,
+    STANDING_EXPORT_FIELDS,
+    export_games,
+    export_standings,
+)
+from .ingest import GameBatch, GameBatchSerializer, PlayerImport
+from .lean import GAME_COLUMNS, PLAYER_COLUMNS, TOURNAMENT_COLUMNS
+from .leaderboard import get_leaderboard, get_leaderboards
+from .matrix import get_matrix
+from .scheduling import get_next_round, schedule_round_robin
+from .metrics import request_metrics
 from .serializers import (
     PlayerSerializer, 
+    PlayerStatsSerializer,
     TournamentSerializer, 
     GameSerializer,
+    RecordResultSerializer,
     AddPlayerToTournamentSerializer,
-    TournamentLeaderboardSerializer,
+    AddPlayersToTournamentSerializer,
     LeaderboardEntrySerializer
 )
 
 
-class PlayerListView(generics.ListCreateAPIView):
+class LeanListMixin:
+    lean_columns = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.TOURNAMENT_LEAN_READS:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.lean_columns.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.lean_columns.build(page))
+        return Response(self.lean_columns.build(queryset))
+
+
+class PlayerListView(WeakETagMixin, LeanListMixin, generics.ListCreateAPIView):
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
+    lean_columns = PLAYER_COLUMNS
+    keyset_ordering = ('name', 'id')
+
+
+class PlayerImportView(APIView):
+    chunk_size = 1000
+
+    def post(self, request):
+        upload = request.FILES.get('file') if request.content_type.startswith('multipart/') else request.stream
+        if upload is None:
+            return Response({'error': 'Upload a CSV or NDJSON file.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        import_format = self.guess_format(request, upload)
+        player_import = PlayerImport(chunk_size=self.chunk_size)
+        parse = {'csv': player_import.parse_csv, 'ndjson': player_import.parse_ndjson}.get(import_format)
+        if parse is None:
+            return Response(
+                {'error': 'Unsupported format. Send text/csv or application/x-ndjson, or a .csv or .ndjson file.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            player_import.run(parse(upload))
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            # Chunks before the error are already committed, so report them alongside it.
+            return Response({'error': str(e), **player_import.summary()}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(player_import.summary(), status=status.HTTP_201_CREATED)
+
+    def guess_format(self, request, upload):
+        name = getattr(upload, 'name', '') or ''
+        # Parameters such as "; charset=utf-8" do not change the format.
+        media_type = request.content_type.split(';')[0].strip().lower()
+        if name.endswith('.csv') or media_type == 'text/csv':
+            return 'csv'
+        if name.endswith(('.ndjson', '.jsonl')) or media_type in ('application/x-ndjson', 'application/jsonl'):
+            return 'ndjson'
+        return None
+
+
+class PlayerRankingView(WeakETagMixin, generics.ListAPIView):
+    queryset = Player.objects.order_by('-rating', 'id')
+    serializer_class = PlayerSerializer
+    keyset_ordering = ('-rating', 'id')
 
 
-class PlayerDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PlayerStatsListView(generics.ListAPIView):
+    serializer_class = PlayerStatsSerializer
+    default_ordering = '-points'
+
+    def list(self, request, *args, **kwargs):
+        ordering = request.query_params.get('ordering', self.default_ordering)
+        if ordering.lstrip('-') not in PlayerStats.SORTABLE_FIELDS:
+            fields = ', '.join(PlayerStats.SORTABLE_FIELDS)
+            return Response(
+                {'error': f'ordering must be one of: {fields} (prefix with - for descending).'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Ties are broken by player id in the same direction, so both directions read one index.
+        self.keyset_ordering = (ordering, ('-' if ordering.startswith('-') else '') + 'player_id')
+        return super().list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return PlayerStats.objects.select_related('player').order_by(*self.keyset_ordering)
+
+
+class PlayerStatsView(APIView):
+    def get(self, request, pk):
+        stats = get_object_or_404(PlayerStats.objects.select_related('player'), player_id=pk)
+        return Response(PlayerStatsSerializer(stats).data)
+
+
+class PlayerDetailView(ConditionalObjectMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
 
+    @conditional(Player, player_tag)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
+TOURNAMENT_PLAYERS = Prefetch('players', queryset=Player.objects.only('id'))
 
-class TournamentListView(generics.ListCreateAPIView):
-    queryset = Tournament.objects.all()
+TOURNAMENT_QUERYSET = Tournament.objects.prefetch_related(TOURNAMENT_PLAYERS)
+
+GAME_QUERYSET = Game.objects.select_related('player1', 'player2', 'winner')
+
+
+class TournamentListView(WeakETagMixin, LeanListMixin, generics.ListCreateAPIView):
+    queryset = TOURNAMENT_QUERYSET
     serializer_class = TournamentSerializer
+    lean_columns = TOURNAMENT_COLUMNS
+    keyset_ordering = ('-created_at', '-id')
 
 
-class TournamentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Tournament.objects.all()
+class TournamentDetailView(ConditionalObjectMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = TOURNAMENT_QUERYSET
     serializer_class = TournamentSerializer
+    conditional_prefetch = [TOURNAMENT_PLAYERS]
+
+    @conditional(Tournament, tournament_tag)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
 
 
 class TournamentAddPlayerView(APIView):
@@ -39,33 +166,36 @@ class TournamentAddPlayerView(APIView):
         serializer = AddPlayerToTournamentSerializer(data=request.data)
         
         if serializer.is_valid():
-            player_id = serializer.validated_data['player_id']
-            
-            if tournament.players.count() >= 5:
-                return Response(
-                    {'error': 'Tournament already has the maximum of 5 participants.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            player = Player.objects.get(id=player_id)
-            
-            if tournament.players.filter(id=player_id).exists():
-                return Response(
-                    {'error': 'Player is already part of this tournament.'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            tournament.players.add(player)
-            tournament.update_status()
+            try:
+                names = tournament.add_players([serializer.validated_data['player_id']])
+            except DjangoValidationError as e:
+                return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
             
             return Response(
-                {'message': f'Player {player.name} added to tournament {tournament.name}.'},
+                {'message': f'Player {names[0]} added to tournament {tournament.name}.'},
                 status=status.HTTP_200_OK
             )
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TournamentAddPlayersView(APIView):
+    def post(self, request, pk):
+        tournament = get_object_or_404(Tournament, pk=pk)
+        serializer = AddPlayersToTournamentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            names = tournament.add_players(serializer.validated_data['player_ids'])
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(
+            {'message': f'Added {len(names)} players to tournament {tournament.name}.', 'players': names},
+            status=status.HTTP_200_OK
+        )
+
+
 class TournamentRemovePlayerView(APIView):
     def delete(self, request, pk):
         tournament = get_object_or_404(Tournament, pk=pk)
@@ -85,23 +215,10 @@ class TournamentRemovePlayerView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        if not tournament.players.filter(id=player_id).exists():
-            return Response(
-                {'error': 'Player is not part of this tournament.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        has_games_as_player1 = Game.objects.filter(tournament=tournament, player1=player).exists()
-        has_games_as_player2 = Game.objects.filter(tournament=tournament, player2=player).exists()
-        
-        if has_games_as_player1 or has_games_as_player2:
-            return Response(
-                {'error': 'Cannot remove player who has already played games in this tournament.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        tournament.players.remove(player)
-        tournament.update_status()
+        try:
+            tournament.remove_player(player)
+        except DjangoValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(
             {'message': f'Player {player.name} removed from tournament {tournament.name}.'},
@@ -110,78 +227,95 @@ class TournamentRemovePlayerView(APIView):
 
 
 class TournamentLeaderboardView(APIView):
+    @conditional(Tournament, tournament_tag)
     def get(self, request, pk):
+        return Response(get_leaderboard(self.conditional_object))
+
+
+class LeaderboardBatchView(APIView):
+    max_tournaments = 50
+
+    def get(self, request):
+        try:
+            tournaments = self.get_tournaments(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'count': len(tournaments), 'results': get_leaderboards(tournaments)})
+
+    def get_tournaments(self, request):
+        ids = request.query_params.get('ids')
+        tournament_status = request.query_params.get('status')
+        if ids is None and tournament_status is None:
+            raise ValueError('Pass ids (e.g. ?ids=1,2,3) or status.')
+
+        tournaments = Tournament.objects.order_by('-created_at', '-id')
+        if tournament_status is not None:
+            if tournament_status not in dict(Tournament.STATUS_CHOICES):
+                raise ValueError(
+                    f'status must be one of: {", ".join(choice for choice, _ in Tournament.STATUS_CHOICES)}.'
+                )
+            tournaments = tournaments.filter(status=tournament_status)
+        if ids is None:
+            return list(tournaments[:self.max_tournaments])
+
+        ids = [value.strip() for value in ids.split(',') if value.strip()]
+        if not all(value.isdigit() for value in ids):
+            raise ValueError('ids must be a comma-separated list of tournament ids.')
+        ids = list(dict.fromkeys(map(int, ids)))
+        if len(ids) > self.max_tournaments:
+            raise ValueError(f'At most {self.max_tournaments} tournaments can be requested at once.')
+        found = tournaments.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+
+
+class TournamentScheduleView(APIView):
+    def post(self, request, pk):
         tournament = get_object_or_404(Tournament, pk=pk)
-        
-        leaderboard_data = []
-        
-        for player in tournament.players.all():
-            wins = Game.objects.filter(
-                tournament=tournament,
-                winner=player
-            ).count()
-            
-            draws_as_player1 = Game.objects.filter(
-                tournament=tournament,
-                is_draw=True,
-                player1=player
-            ).count()
-            
-            draws_as_player2 = Game.objects.filter(
-                tournament=tournament,
-                is_draw=True,
-                player2=player
-            ).count()
-            
-            draws = draws_as_player1 + draws_as_player2
-            
-            games_as_player1 = Game.objects.filter(
-                tournament=tournament,
-                player1=player
-            ).exclude(winner__isnull=True, is_draw=False).count()
-            
-            games_as_player2 = Game.objects.filter(
-                tournament=tournament,
-                player2=player
-            ).exclude(winner__isnull=True, is_draw=False).count()
-            
-            games_played = games_as_player1 + games_as_player2
-            
-            losses = games_played - wins - draws
-            
-            points = (wins * 2) + (draws * 1)
-            
-            leaderboard_data.append({
-                'player_id': player.id,
-                'player_name': player.name,
-                'points': points,
-                'wins': wins,
-                'draws': draws,
-                'losses': losses,
-                'games_played': games_played
-            })
-        
-        leaderboard_data.sort(key=lambda x: x['points'], reverse=True)
-        
-        response_data = {
-            'tournament_id': tournament.id,
-            'tournament_name': tournament.name,
-            'status': tournament.status,
-            'total_players': tournament.players.count(),
-            'total_games_played': tournament.get_played_games_count(),
-            'total_expected_games': tournament.get_total_expected_games(),
-            'leaderboard': leaderboard_data
-        }
-        
-        serializer = TournamentLeaderboardSerializer(response_data)
-        return Response(serializer.data)
+        if tournament.players_count < 2:
+            return Response(
+                {'error': 'A tournament needs at least 2 players to be scheduled.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fixtures = schedule_round_robin(tournament.id)
+        return Response(
+            {'created': len(fixtures), 'rounds': len({fixture.round for fixture in fixtures})},
+            status=status.HTTP_201_CREATED if fixtures else status.HTTP_200_OK
+        )
+
+
+class TournamentNextRoundView(APIView):
+    def get(self, request, pk):
+        tournament = get_object_or_404(Tournament, pk=pk)
+        next_round, games = get_next_round(tournament.id)
+        games = games.select_related('player1', 'player2', 'winner').order_by('id')
+        return Response({'round': next_round, 'games': GameSerializer(games, many=True).data})
+
+
+class TournamentMatrixView(APIView):
+    @conditional(Tournament, tournament_tag)
+    def get(self, request, pk):
+        return Response(get_matrix(self.conditional_object))
+
+
+class MetricsView(View):
+    def get(self, request):
+        return HttpResponse(request_metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 
-class GameListView(generics.ListCreateAPIView):
+class CacheStatsView(APIView):
+    def get(self, request):
+        return Response(cache_stats.snapshot())
+
+
+class GameListView(WeakETagMixin, LeanListMixin, generics.ListCreateAPIView):
     serializer_class = GameSerializer
+    lean_columns = GAME_COLUMNS
+    keyset_ordering = ('-played_at', '-id')
     
     def get_queryset(self):
-        queryset = Game.objects.all()
+        queryset = GAME_QUERYSET.all()
         tournament_id = self.request.query_params.get('tournament', None)
         
         if tournament_id is not None:
@@ -190,6 +324,108 @@ class GameListView(generics.ListCreateAPIView):
         return queryset
 
 
+class GameBulkCreateView(APIView):
+    def post(self, request):
+        serializer = GameBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        batch = GameBatch(serializer.validated_data['games'])
+        errors = [{'index': index, 'errors': batch.errors[index]} for index in sorted(batch.errors)]
+
+        if errors and serializer.validated_data['atomic']:
+            return Response({'created': [], 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            games = batch.save() if batch.results else []
+        except IntegrityError:
+            return Response(
+                {'error': f'{DUPLICATE_PAIRING_MESSAGE} A concurrent request recorded the pairing; retry the batch.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        return Response(
+            {'created': [game.id for game in games], 'errors': errors},
+            status=status.HTTP_207_MULTI_STATUS if errors else status.HTTP_201_CREATED
+        )
+
+
 class GameDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Game.objects.all()
+    queryset = GAME_QUERYSET
     serializer_class = GameSerializer
+
+
+class GameResultView(APIView):
+    def post(self, request, pk):
+        game = get_object_or_404(GAME_QUERYSET, pk=pk)
+        serializer = RecordResultSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        try:
+            game.record_result(serializer.validated_data.get('winner'), serializer.validated_data['is_draw'])
+        except DjangoValidationError as e:
+            return Response({'non_field_errors': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(GameSerializer(game).data)
+
+
+class ExportView(View):
+    chunk_size = 2000
+    filename = None
+    fields = None
+
+    def get(self, request):
+        export_format = request.GET.get('format', 'ndjson')
+        if export_format not in EXPORT_FORMATS:
+            return JsonResponse(
+                {'error': f'Unsupported format. Choose one of: {", ".join(EXPORT_FORMATS)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            rows = self.get_rows(request)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The rows are only read while streaming, after the routing middleware has returned, so bind the database now.
+        rows = rows.using(rows.db)
+        content_type, stream = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream(self.fields, rows, self.chunk_size), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{self.filename}.{export_format}"'
+        return response
+
+    def get_int_param(self, request, name):
+        value = request.GET.get(name)
+        if value is None:
+            return None
+        if not value.isdigit():
+            raise ValueError(f'{name} must be an integer.')
+        return int(value)
+
+    def get_datetime_param(self, request, name):
+        value = request.GET.get(name)
+        if value is None:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise ValueError(f'{name} must be an ISO 8601 datetime.')
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+
+class GameExportView(ExportView):
+    filename = 'games'
+    fields = GAME_EXPORT_FIELDS
+
+    def get_rows(self, request):
+        return export_games(
+            tournament_id=self.get_int_param(request, 'tournament'),
+            played_after=self.get_datetime_param(request, 'played_after'),
+            played_before=self.get_datetime_param(request, 'played_before'),
+        )
+
+
+class StandingExportView(ExportView):
+    filename = 'standings'
+    fields = STANDING_EXPORT_FIELDS
+
+    def get_rows(self, request):
+        return export_standings(tournament_id=self.get_int_param(request, 'tournament'))